@@ -0,0 +1,587 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loading import (
+    ANCHO_GRUPO_EDAD,
+    COLUMNAS_COMORBILIDAD,
+    GRUPOS_EDAD,
+    MAX_TABLAS_CACHE,
+    SIN_DATO,
+    TTL_DATOS,
+)
+
+
+# --- Cubo de casos ---
+# Una fila por combinación de dimensiones, con el número de casos y el número
+# de casos con cada comorbilidad como medidas. DEFUNCION es el desenlace:
+# True si FECHA_DEF tiene fecha.
+DIMENSIONES_CUBO = [
+    "REGION",
+    "ENTIDAD",
+    "CLASIFICACION_FINAL",
+    "SEXO",
+    "TIPO_PACIENTE",
+    "DEFUNCION",
+]
+
+
+def construir_cubo(df, dimensiones=DIMENSIONES_CUBO):
+    columnas = {
+        col: df[col] for col in dimensiones if col in df.columns
+    }
+    columnas["DEFUNCION"] = df["FECHA_DEF"].notna()
+    columnas["CASOS"] = np.ones(len(df), dtype=np.int32)
+    for col in COLUMNAS_COMORBILIDAD:
+        if col in df.columns:
+            columnas[col] = df[col].to_numpy() == 1
+    dimensiones = [col for col in dimensiones if col in columnas]
+    return (
+        pd.DataFrame(columnas)
+        .groupby(dimensiones, observed=True, dropna=False, sort=False)
+        .sum()
+        .astype(np.int64)
+        .reset_index()
+    )
+
+
+# Se construye una vez por carga de la tabla; table_name y clave (ver
+# clave_tabla) identifican la versión de los datos, _df no se hashea.
+@st.cache_resource(show_spinner=False, ttl=TTL_DATOS, max_entries=MAX_TABLAS_CACHE)
+def cubo_casos(_df, table_name, clave):
+    return construir_cubo(_df)
+
+
+# Celdas del cubo que cumplen los filtros {columna: valor}
+def filtrar_cubo(cubo, **filtros):
+    mascara = np.ones(len(cubo), dtype=bool)
+    for col, valor in filtros.items():
+        mascara &= cubo[col].to_numpy() == valor
+    return cubo[mascara]
+
+
+# Suma de una medida sobre las celdas que cumplen los filtros
+def contar(celdas, medida="CASOS", **filtros):
+    if medida not in celdas.columns:
+        return 0
+    return int(filtrar_cubo(celdas, **filtros)[medida].sum())
+
+
+# --- Conteos acumulados por edad ---
+# Para cada celda del cubo, los casos y comorbilidades acumulados por EDAD:
+# acumulados[celda, e] cuenta los casos con edad menor que e. Las celdas de
+# cualquier rango de edad [desde, hasta] salen de una resta por celda,
+# acumulados[:, hasta + 1] - acumulados[:, desde], sin recorrer la tabla.
+# Las edades faltantes (SIN_DATO) solo cuentan en el cubo completo.
+def construir_acumulados(conteos):
+    conteos = conteos[conteos["EDAD"] >= 0]
+    medidas = [
+        col for col in ["CASOS"] + COLUMNAS_COMORBILIDAD if col in conteos.columns
+    ]
+    grupos = conteos.groupby(DIMENSIONES_CUBO, observed=True, dropna=False, sort=False)
+    celda = grupos.ngroup().to_numpy()
+    celdas = grupos.size().reset_index()[DIMENSIONES_CUBO]
+    edades = conteos["EDAD"].to_numpy().astype(np.int64)
+    n_edades = int(edades.max()) + 1 if len(edades) else 0
+
+    por_edad = np.zeros((len(celdas), n_edades, len(medidas)), dtype=np.int64)
+    codigo = celda * n_edades + edades
+    for j, col in enumerate(medidas):
+        por_edad[:, :, j] = np.bincount(
+            codigo, weights=conteos[col].to_numpy(), minlength=len(celdas) * n_edades
+        ).reshape(len(celdas), n_edades)
+    acumulados = np.zeros((len(celdas), n_edades + 1, len(medidas)), dtype=np.int32)
+    np.cumsum(por_edad, axis=1, out=acumulados[:, 1:, :])
+    return {"celdas": celdas, "medidas": medidas, "acumulados": acumulados}
+
+
+@st.cache_resource(show_spinner=False, ttl=TTL_DATOS, max_entries=MAX_TABLAS_CACHE)
+def acumulados_edad(_df, table_name, clave):
+    return construir_acumulados(construir_cubo(_df, DIMENSIONES_CUBO + ["EDAD"]))
+
+
+# Celdas del cubo que cumplen los filtros con los conteos de las edades entre
+# desde y hasta (inclusive): dos lecturas por celda y medida.
+def cubo_rango_edad(acumulados, desde, hasta, **filtros):
+    celdas = acumulados["celdas"]
+    seleccion = np.ones(len(celdas), dtype=bool)
+    for col, valor in filtros.items():
+        seleccion &= celdas[col].to_numpy() == valor
+    tabla = acumulados["acumulados"][seleccion]
+    limite = tabla.shape[1] - 1
+    desde = min(max(desde, 0), limite)
+    hasta = min(max(hasta + 1, desde), limite)
+    resultado = celdas[seleccion].reset_index(drop=True)
+    conteos = (tabla[:, hasta, :] - tabla[:, desde, :]).astype(np.int64)
+    for j, col in enumerate(acumulados["medidas"]):
+        resultado[col] = conteos[:, j]
+    return resultado
+
+
+# --- Conteo de comorbilidades ---
+# Matriz booleana (filas × comorbilidades): True si el caso tiene la
+# comorbilidad (valor 1). Con ella los diez conteos de cualquier subconjunto
+# salen de una sola pasada: matriz[mascara].sum(axis=0).
+def construir_matriz_comorbilidades(df):
+    columnas = [col for col in COLUMNAS_COMORBILIDAD if col in df.columns]
+    matriz = np.empty((len(df), len(columnas)), dtype=bool)
+    for j, col in enumerate(columnas):
+        np.equal(df[col].to_numpy(), 1, out=matriz[:, j])
+    return columnas, matriz
+
+
+@st.cache_resource(show_spinner=False, ttl=TTL_DATOS, max_entries=MAX_TABLAS_CACHE)
+def matriz_comorbilidades(_df, table_name, clave):
+    return construir_matriz_comorbilidades(_df)
+
+
+# --- Índice de bitmaps ---
+# Un bitmap empaquetado (np.packbits, 1 bit por fila) por cada valor de las
+# columnas de filtro. Una combinación de filtros se resuelve con AND/OR de
+# bitmaps y los conteos con popcount, sin volver a comparar columnas.
+# DEFUNCION (FECHA_DEF con fecha) se indexa como una columna más.
+COLUMNAS_INDICE = [
+    "REGION",
+    "ENTIDAD",
+    "CLASIFICACION_FINAL",
+    "SEXO",
+    "TIPO_PACIENTE",
+    "INTUBADO",
+]
+
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def construir_indice_bitmap(df):
+    bitmaps = {}
+    for col in COLUMNAS_INDICE:
+        if col not in df.columns:
+            continue
+        codigos, valores = pd.factorize(df[col], sort=True)
+        bitmaps[col] = {
+            valor: np.packbits(codigos == i) for i, valor in enumerate(valores)
+        }
+    if "FECHA_DEF" in df.columns:
+        defuncion = df["FECHA_DEF"].notna().to_numpy()
+        bitmaps["DEFUNCION"] = {
+            True: np.packbits(defuncion),
+            False: np.packbits(~defuncion),
+        }
+    return {"filas": len(df), "bitmaps": bitmaps}
+
+
+@st.cache_resource(show_spinner=False, ttl=TTL_DATOS, max_entries=MAX_TABLAS_CACHE)
+def indice_bitmap(_df, table_name, clave):
+    return construir_indice_bitmap(_df)
+
+
+# Bitmap de las filas que cumplen todos los filtros (AND entre columnas).
+# Un filtro con lista de valores es el OR de sus bitmaps.
+def consultar_bitmap(indice, **filtros):
+    resultado = np.full((indice["filas"] + 7) // 8, 0xFF, dtype=np.uint8)
+    if indice["filas"] % 8:
+        resultado[-1] = (0xFF << (8 - indice["filas"] % 8)) & 0xFF
+    for col, valor in filtros.items():
+        por_valor = indice["bitmaps"][col]
+        valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+        union = np.zeros_like(resultado)
+        for v in valores:
+            if v in por_valor:
+                union |= por_valor[v]
+        resultado &= union
+    return resultado
+
+
+def contar_bitmap(bitmap):
+    return int(POPCOUNT[bitmap].sum(dtype=np.int64))
+
+
+# Máscara booleana por fila, para seleccionar filas del DataFrame
+def mascara_bitmap(indice, bitmap):
+    return np.unpackbits(bitmap, count=indice["filas"]).view(bool)
+
+
+def mascara_filtros(indice, **filtros):
+    return mascara_bitmap(indice, consultar_bitmap(indice, **filtros))
+
+
+# --- Índice de fechas ---
+# Permutación que ordena las filas por FECHA_INGRESO (las filas sin fecha
+# quedan al final) junto con las fechas ya ordenadas. Un periodo es un tramo
+# contiguo de la permutación que se ubica con searchsorted: acotar a dos
+# semanas cuesta O(log n) más el tramo, no una máscara sobre toda la tabla.
+@st.cache_resource(show_spinner=False, ttl=TTL_DATOS, max_entries=MAX_TABLAS_CACHE)
+def indice_fechas(_df, table_name, clave):
+    fechas = _df["FECHA_INGRESO"].to_numpy().astype("datetime64[D]")
+    orden = np.argsort(fechas, kind="stable").astype(np.int32)
+    return orden, fechas[orden]
+
+
+# Posiciones (en orden de tabla) de las filas con fecha de ingreso entre
+# inicio y fin, inclusive
+def filas_periodo(indice, inicio, fin):
+    orden, fechas = indice
+    desde = np.searchsorted(fechas, np.datetime64(inicio, "D"), side="left")
+    hasta = np.searchsorted(fechas, np.datetime64(fin, "D"), side="right")
+    return np.sort(orden[desde:hasta])
+
+
+# --- Conteos agrupados ---
+# Conteos por grupo con el mismo formato que conteos_sql (pushdown.py): una
+# fila por combinación de grupos con CASOS y el número de casos con cada
+# comorbilidad pedida. Solo se proyectan las columnas de agrupación de las
+# filas seleccionadas.
+#
+# Sin filas, los filtros se resuelven con el índice de bitmaps sobre toda la
+# tabla. Con filas (posiciones de filas_filtros) la consulta se limita a esas
+# filas y sus filtros se evalúan solo sobre ellas, así que el costo depende
+# del tamaño de la selección y no del de la tabla.
+MAX_FILTROS_CACHE = 32
+
+
+# rangos {columna: (desde, hasta)} limita además las filas a valores entre
+# desde y hasta, inclusive. Con rango de FECHA_INGRESO los filtros se evalúan
+# solo sobre el tramo del índice de fechas; los demás rangos, sobre las filas
+# ya seleccionadas.
+@st.cache_resource(show_spinner=False, ttl=TTL_DATOS, max_entries=MAX_FILTROS_CACHE)
+def filas_filtros(_df, _indice, table_name, clave, rangos=None, **filtros):
+    rangos = dict(rangos or {})
+    periodo = rangos.pop("FECHA_INGRESO", None)
+    if periodo is None:
+        filas = np.flatnonzero(mascara_filtros(_indice, **filtros)).astype(np.int32)
+    else:
+        filas = filas_periodo(indice_fechas(_df, table_name, clave), *periodo)
+        filas = filtrar_filas(_df, filas, **filtros)
+    for col, (desde, hasta) in rangos.items():
+        valores = columna_filas(_df, col, filas).to_numpy()
+        filas = filas[(valores >= desde) & (valores <= hasta)]
+    return filas
+
+
+def columna_filas(df, col, filas):
+    if col == "DEFUNCION":
+        return df["FECHA_DEF"].iloc[filas].notna()
+    return df[col].iloc[filas]
+
+
+def filtrar_filas(df, filas, **filtros):
+    for col, valor in filtros.items():
+        valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+        filas = filas[columna_filas(df, col, filas).isin(valores).to_numpy()]
+    return filas
+
+
+# Grupos de columnas int8 (catálogos, MES_INGRESO, GRUPO_EDAD): cada
+# combinación de valores es un código entero y los conteos salen de
+# np.bincount, sin groupby. Solo quedan las combinaciones con casos. Devuelve
+# None si hay demasiadas combinaciones posibles para un arreglo de conteos.
+MAX_CODIGOS = 1 << 16
+
+
+def conteos_codigos(proyeccion, grupos, medidas):
+    minimos = []
+    tamanos = []
+    codigo = 0
+    for col in grupos:
+        valores = proyeccion[col].to_numpy().astype(np.int64)
+        minimo = int(valores.min()) if len(valores) else 0
+        tamano = int(valores.max()) - minimo + 1 if len(valores) else 1
+        codigo = codigo * tamano + (valores - minimo)
+        minimos.append(minimo)
+        tamanos.append(tamano)
+    total = int(np.prod(tamanos))
+    if total > MAX_CODIGOS:
+        return None
+
+    casos = np.bincount(codigo, minlength=total)
+    presentes = np.flatnonzero(casos)
+    resultado = {
+        col: (valores + minimo).astype(np.int8)
+        for col, valores, minimo in zip(
+            grupos, np.unravel_index(presentes, tamanos), minimos
+        )
+    }
+    resultado["CASOS"] = casos[presentes].astype(np.int64)
+    for col, valores in medidas.items():
+        resultado[col] = (
+            np.bincount(codigo, weights=valores, minlength=total)[presentes]
+            .astype(np.int64)
+        )
+    return pd.DataFrame(resultado)
+
+
+def conteos_memoria(df, indice, matriz, grupos, medidas=(), filas=None, **filtros):
+    grupos = list(grupos)
+    columnas, datos = matriz
+    medidas = [col for col in medidas if col in columnas]
+    if filas is None:
+        bitmap = consultar_bitmap(indice, **filtros)
+        if not grupos and not medidas:
+            return pd.DataFrame([{"CASOS": contar_bitmap(bitmap)}], dtype=np.int64)
+        seleccion = np.flatnonzero(mascara_bitmap(indice, bitmap))
+    else:
+        seleccion = filtrar_filas(df, filas, **filtros)
+
+    if not grupos:
+        fila = {"CASOS": len(seleccion)}
+        if medidas:
+            conteos = datos[seleccion].sum(axis=0)
+            fila.update({col: int(conteos[columnas.index(col)]) for col in medidas})
+        return pd.DataFrame([fila], dtype=np.int64)
+
+    proyeccion = {col: columna_filas(df, col, seleccion) for col in grupos}
+    if all(proyeccion[col].dtype == np.int8 for col in grupos):
+        conteos = conteos_codigos(
+            proyeccion,
+            grupos,
+            {col: datos[seleccion, columnas.index(col)] for col in medidas},
+        )
+        if conteos is not None:
+            return conteos
+    proyeccion["CASOS"] = np.ones(len(seleccion), dtype=np.int64)
+    for col in medidas:
+        proyeccion[col] = datos[seleccion, columnas.index(col)]
+    return (
+        pd.DataFrame(proyeccion)
+        .groupby(grupos, observed=True, dropna=False, sort=False)
+        .sum()
+        .astype(np.int64)
+        .reset_index()
+    )
+
+
+# --- Conjunto particionado por año ---
+# Cada año es una partición con su propia función de conteo (conteos_memoria
+# o conteos_sql ya ligada a su tabla). Una consulta sobre varios años se
+# agrega en cada partición y los resultados, ya pequeños, se combinan
+# sumando por grupo; nunca se concatenan filas de las tablas. ANIO se puede
+# usar como filtro (las particiones que no cumplen no se consultan) o como
+# grupo.
+def combinar_conteos(conteos, grupos):
+    if len(conteos) == 1:
+        return conteos[0]
+    combinado = pd.concat(conteos, ignore_index=True)
+    grupos = [col for col in grupos if col in combinado.columns]
+    if not grupos:
+        return combinado.sum().to_frame().T.fillna(0).astype(np.int64)
+    return (
+        combinado.groupby(grupos, observed=True, dropna=False, sort=False)
+        .sum()
+        .astype(np.int64)
+        .reset_index()
+    )
+
+
+def conteos_particiones(particiones, grupos, medidas=(), **filtros):
+    grupos = list(grupos)
+    anios = filtros.pop("ANIO", None)
+    if anios is not None and not isinstance(anios, (list, tuple, set)):
+        anios = [anios]
+    grupos_particion = [col for col in grupos if col != "ANIO"]
+    conteos = []
+    for anio, contar_particion in particiones.items():
+        if anios is not None and anio not in anios:
+            continue
+        conteo = contar_particion(grupos_particion, medidas, **filtros)
+        if "ANIO" in grupos:
+            conteo = conteo.assign(ANIO=anio)
+            conteo = conteo[grupos + [c for c in conteo.columns if c not in grupos]]
+        conteos.append(conteo)
+    if not conteos:
+        return pd.DataFrame(columns=grupos + ["CASOS"] + list(medidas))
+    return combinar_conteos(conteos, grupos)
+
+
+# --- Serie de tiempo diaria ---
+# Casos por día de ingreso y combinación de DIMENSIONES_SERIE (entidad,
+# clasificación y desenlace) en una matriz días × combinaciones. Solo se
+# guardan las combinaciones que aparecen en la tabla. Se construye una vez
+# por tabla con np.bincount sobre el día ordinal y el código de combinación;
+# cualquier curva (filtro, rango de fechas, frecuencia) es un corte de la
+# matriz y no vuelve a recorrer la tabla.
+DIMENSIONES_SERIE = ["REGION", "ENTIDAD", "CLASIFICACION_FINAL", "DEFUNCION"]
+
+
+# datos: FECHA_INGRESO y DIMENSIONES_SERIE por fila, o por grupo con casos
+# (conteos agrupados). Las filas sin fecha de ingreso no entran a la serie.
+def construir_serie(datos, casos=None):
+    dias = datos["FECHA_INGRESO"].to_numpy().astype("datetime64[D]")
+    validas = ~np.isnat(dias)
+    if not validas.any():
+        return {
+            "inicio": None,
+            "combinaciones": pd.DataFrame(columns=DIMENSIONES_SERIE),
+            "conteos": np.zeros((0, 0), dtype=np.int32),
+        }
+    dias = dias[validas]
+    inicio = dias.min()
+    ordinal = (dias - inicio).astype(np.int64)
+    n_dias = int(ordinal.max()) + 1
+
+    codigo = 0
+    valores_dimension = []
+    for col in DIMENSIONES_SERIE:
+        codigos, valores = pd.factorize(datos[col][validas], use_na_sentinel=False)
+        codigo = codigo * len(valores) + codigos
+        valores_dimension.append(pd.Index(valores))
+    combinacion, presentes = pd.factorize(codigo)
+    tamanos = [len(valores) for valores in valores_dimension]
+    combinaciones = pd.DataFrame(
+        {
+            col: valores.take(posiciones)
+            for col, valores, posiciones in zip(
+                DIMENSIONES_SERIE,
+                valores_dimension,
+                np.unravel_index(presentes, tamanos),
+            )
+        }
+    )
+
+    pesos = None if casos is None else np.asarray(casos)[validas]
+    conteos = np.bincount(
+        ordinal * len(presentes) + combinacion,
+        weights=pesos,
+        minlength=n_dias * len(presentes),
+    )
+    return {
+        "inicio": inicio,
+        "combinaciones": combinaciones,
+        "conteos": conteos.astype(np.int32).reshape(n_dias, len(presentes)),
+    }
+
+
+@st.cache_resource(show_spinner=False, ttl=TTL_DATOS, max_entries=MAX_TABLAS_CACHE)
+def serie_diaria(_df, table_name, clave):
+    todas = slice(None)
+    return construir_serie(
+        pd.DataFrame(
+            {
+                col: columna_filas(_df, col, todas)
+                for col in ["FECHA_INGRESO"] + DIMENSIONES_SERIE
+            }
+        )
+    )
+
+
+# Casos por día de las series (una por año) que cumplen los filtros, con los
+# días sin casos en cero. inicio y fin (fechas, inclusive) recortan la curva.
+def curva_diaria(series, inicio=None, fin=None, **filtros):
+    partes = []
+    for serie in series:
+        if serie["inicio"] is None:
+            continue
+        combinaciones = serie["combinaciones"]
+        seleccion = np.ones(len(combinaciones), dtype=bool)
+        for col, valor in filtros.items():
+            valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+            seleccion &= combinaciones[col].isin(valores).to_numpy()
+        conteos = serie["conteos"]
+        partes.append(
+            pd.Series(
+                conteos[:, seleccion].sum(axis=1, dtype=np.int64),
+                index=pd.date_range(serie["inicio"], periods=len(conteos), freq="D"),
+            )
+        )
+    if not partes:
+        return pd.Series(dtype=np.int64, index=pd.DatetimeIndex([], freq="D"))
+    curva = pd.concat(partes).groupby(level=0).sum().asfreq("D", fill_value=0)
+    return curva.loc[inicio:fin]
+
+
+# --- Límites de los controles de la barra lateral ---
+# Primer y último día de ingreso y edad máxima de la tabla (None si no hay
+# fechas o edades válidas). Solo recorren dos columnas: los controles se
+# dibujan sin esperar la serie diaria ni los conteos acumulados por edad.
+def construir_limites(fechas, edad):
+    fechas = fechas[~np.isnat(fechas)]
+    return {
+        "fechas": (fechas.min(), fechas.max()) if len(fechas) else None,
+        "edad": int(edad) if edad is not None and edad >= 0 else None,
+    }
+
+
+@st.cache_resource(show_spinner=False, ttl=TTL_DATOS, max_entries=MAX_TABLAS_CACHE)
+def limites_tabla(_df, table_name, clave):
+    return construir_limites(
+        _df["FECHA_INGRESO"].to_numpy().astype("datetime64[D]"),
+        _df["EDAD"].max() if len(_df) else None,
+    )
+
+
+# Rango de fechas y edad máxima de varias tablas (una por año)
+def combinar_limites(limites):
+    fechas = [lim["fechas"] for lim in limites if lim["fechas"] is not None]
+    edades = [lim["edad"] for lim in limites if lim["edad"] is not None]
+    rango = (
+        (min(inicio for inicio, _ in fechas), max(fin for _, fin in fechas))
+        if fechas
+        else None
+    )
+    return rango, max(edades) if edades else None
+
+
+# Curva por frecuencia ("D", "W" o "MS") y, si hay ventana, su promedio móvil
+# de ventana periodos
+def agregar_curva(curva, frecuencia="D", ventana=None):
+    if frecuencia != "D":
+        curva = curva.resample(frecuencia).sum()
+    if not ventana:
+        return curva, None
+    return curva, curva.rolling(ventana, min_periods=1).mean()
+
+
+# --- Conteos por rango de edad ---
+# Los rangos de las gráficas (bins en años, intervalos [inicio, fin)) son
+# uniones de grupos quinquenales: rangos_edad lleva cada código de GRUPO_EDAD
+# al índice de su rango, o a SIN_DATO si queda fuera. Así cualquier rango se
+# obtiene de los conteos por GRUPO_EDAD sin volver a leer EDAD.
+def rangos_edad(bins):
+    limites = np.asarray(bins) // ANCHO_GRUPO_EDAD
+    if np.any(np.asarray(bins) % ANCHO_GRUPO_EDAD) or limites[-1] > GRUPOS_EDAD:
+        raise ValueError(f"Rangos de edad no compatibles con GRUPO_EDAD: {bins}")
+    codigos = np.arange(GRUPOS_EDAD)
+    rango = np.searchsorted(limites, codigos, side="right") - 1
+    rango[(codigos < limites[0]) | (codigos >= limites[-1])] = SIN_DATO
+    return rango
+
+
+# Histograma de casos por rango de edad a partir de los conteos agrupados por
+# GRUPO_EDAD (conteos_memoria o conteos_sql). Con columna, histograma 2D
+# (rango × valores de la columna); los demás valores se descartan.
+def histograma_edad(conteos, bins, columna=None, valores=()):
+    n_rangos = len(bins) - 1
+    codigos = conteos["GRUPO_EDAD"].to_numpy().astype(np.int64)
+    rango = np.where(codigos >= 0, rangos_edad(bins)[codigos], SIN_DATO)
+    casos = conteos["CASOS"].to_numpy()
+    if columna is None:
+        validos = rango >= 0
+        return np.bincount(
+            rango[validos], weights=casos[validos], minlength=n_rangos
+        ).astype(np.int64)
+
+    posicion = pd.Index(valores).get_indexer(conteos[columna])
+    validos = (rango >= 0) & (posicion >= 0)
+    celda = rango[validos] * len(valores) + posicion[validos]
+    return (
+        np.bincount(celda, weights=casos[validos], minlength=n_rangos * len(valores))
+        .astype(np.int64)
+        .reshape(n_rangos, len(valores))
+    )
+
+
+# Conteo por rango de edad y una columna de catálogo en formato largo, ordenado
+# por rango y etiqueta. Las etiquetas se aplican al resultado agregado.
+def contar_por_rango_edad(
+    conteos, columna, etiquetas, bins, labels, nombre_columna, nombre_conteo
+):
+    valores = sorted(etiquetas, key=etiquetas.get)
+    histograma = histograma_edad(conteos, bins, columna, valores)
+    return pd.DataFrame(
+        {
+            "RANGO_EDAD": pd.Categorical(
+                np.repeat(labels, len(valores)), categories=labels, ordered=True
+            ),
+            nombre_columna: [etiquetas[v] for v in valores] * len(labels),
+            nombre_conteo: histograma.ravel(),
+        }
+    )
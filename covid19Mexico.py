@@ -1,10 +1,66 @@
+from functools import partial
+
 import streamlit as st
 import pandas as pd
-import pymysql
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
-import matplotlib.ticker as ticker
+
+from analytics import (
+    DIMENSIONES_CUBO,
+    DIMENSIONES_SERIE,
+    acumulados_edad,
+    agregar_curva,
+    combinar_conteos,
+    combinar_limites,
+    construir_serie,
+    contar,
+    contar_por_rango_edad,
+    conteos_memoria,
+    conteos_particiones,
+    cubo_casos,
+    cubo_rango_edad,
+    curva_diaria,
+    filas_filtros,
+    filtrar_cubo,
+    histograma_edad,
+    indice_bitmap,
+    limites_tabla,
+    matriz_comorbilidades,
+    serie_diaria,
+)
+from data_loading import (
+    COLUMNAS_COMORBILIDAD,
+    MODO_DATOS,
+    PRECARGA_ANIOS,
+    PoolAgotado,
+    clave_tabla,
+    invalidar_tabla,
+    load_table_cached,
+    precargar,
+    reporte_memoria,
+)
+from pushdown import (
+    acumulados_edad_sql,
+    conteos_sql,
+    limites_sql,
+    serie_diaria_sql,
+)
+from visualizations import (
+    clave_figura,
+    completar_tanda,
+    grafica_comorbilidades_confirmados,
+    grafica_comorbilidades_fallecidos,
+    grafica_comorbilidades_grupo,
+    grafica_curva_epidemica,
+    grafica_edad_sexo,
+    grafica_edad_tipo_paciente,
+    grafica_intubacion_edad,
+    grafica_intubados_mes,
+    grafica_rango_edad,
+    grafica_sintomas_ingreso,
+    grafica_sospechosos_mes,
+    mostrar_figura,
+    nueva_tanda,
+)
 
 def divisor_visual():
     st.markdown(
@@ -22,37 +78,6 @@ def encabezado_grafica(titulo):
         unsafe_allow_html=True,
     ) 
 
-# --- Conexión a MySQL ---
-def get_mysql_connection():
-    return pymysql.connect(
-        host="localhost",
-        user="root",
-        password="Wizardkiller#02",
-        database="covid19",
-        cursorclass=pymysql.cursors.Cursor,
-    )
-
-
-# --- Cache por año ---
-@st.cache_data(show_spinner="Cargando datos desde MySQL...")
-def load_table_cached(table_name):
-    try:
-        connection = get_mysql_connection()
-        with connection.cursor() as cursor:
-            sql = f"SELECT * FROM {table_name}"
-            cursor.execute(sql)
-            columnas = [col[0] for col in cursor.description]
-            datos = cursor.fetchall()
-            df = pd.DataFrame(datos, columns=columnas)
-            return df
-    except Exception as e:
-        st.error(f"Error al cargar {table_name}: {e}")
-        return pd.DataFrame()
-    finally:
-        if connection:
-            connection.close()
-
-
 tablas = {
     "2020": "covid19_2020",
     "2021": "covid19_2021",
@@ -60,115 +85,334 @@ tablas = {
     "2023": "covid19_2023",
 }
 
-st.title("Dashboard de Datos COVID 19")
-
-st.sidebar.header("Parámetros")
-seleccion = st.sidebar.selectbox("Selecciona el año", list(tablas.keys()))
-
-if "cache_dfs" not in st.session_state:
-    st.session_state.cache_dfs = {}
-
-if seleccion not in st.session_state.cache_dfs:
-    st.session_state.cache_dfs[seleccion] = load_table_cached(tablas[seleccion])
-
-df = st.session_state.cache_dfs[seleccion]
-
-if not df.empty:
-    st.success("Datos cargados correctamente.")
+# Columnas que usa cada sección del dashboard; solo se descarga su unión
+columnas_graficas = {
+    "filtros": ["REGION", "ENTIDAD", "FECHA_INGRESO", "EDAD"],
+    "kpis": ["CLASIFICACION_FINAL", "FECHA_DEF", "SEXO", "TIPO_PACIENTE"]
+    + COLUMNAS_COMORBILIDAD,
+    "edad_sexo": ["CLASIFICACION_FINAL", "EDAD", "SEXO"],
+    "edad_tipo_paciente": ["CLASIFICACION_FINAL", "EDAD", "TIPO_PACIENTE"],
+    "comorbilidades_confirmados": ["CLASIFICACION_FINAL"] + COLUMNAS_COMORBILIDAD,
+    "intubados_mes": ["FECHA_INGRESO", "INTUBADO"],
+    "sospechosos_mes": ["FECHA_INGRESO", "CLASIFICACION_FINAL"],
+    "curva_epidemica": [
+        "FECHA_INGRESO",
+        "REGION",
+        "ENTIDAD",
+        "CLASIFICACION_FINAL",
+        "FECHA_DEF",
+    ],
+    "comorbilidades_grupo": ["CLASIFICACION_FINAL", "FECHA_DEF"] + COLUMNAS_COMORBILIDAD,
+    "rango_edad": ["EDAD"],
+    "comorbilidades_fallecidos": ["FECHA_DEF"] + COLUMNAS_COMORBILIDAD,
+    "intubacion_edad": ["INTUBADO", "EDAD"],
+    "sintomas_ingreso": ["FECHA_SINTOMAS", "FECHA_INGRESO"],
+    "intubacion_comorbilidades": ["INTUBADO"] + COLUMNAS_COMORBILIDAD,
+}
+columnas_dashboard = tuple(
+    dict.fromkeys(col for cols in columnas_graficas.values() for col in cols)
+)
 
-    st.sidebar.header("Filtros")
 
-    regiones = df["REGION"].dropna().unique()
-    region_seleccionada = st.sidebar.selectbox(
-        "Selecciona una Región", sorted(regiones)
-    )
+# Cuerpo del dashboard. Streamlit ejecuta el script como __main__; los
+# procesos del pool de gráficas (spawn) lo importan como __mp_main__ y solo
+# cargan los módulos y las constantes de arriba, sin volver a ejecutarlo.
+def main():
+    st.title("Dashboard de Datos COVID 19")
 
-    entidades = df[df["REGION"] == region_seleccionada]["ENTIDAD"].dropna().unique()
-    entidad_seleccionada = st.sidebar.selectbox(
-        "Selecciona una Entidad Federativa", sorted(entidades)
+    st.sidebar.header("Parámetros")
+    seleccion = st.sidebar.multiselect(
+        "Selecciona los años", list(tablas.keys()), default=list(tablas.keys())[:1]
     )
+    if not seleccion:
+        st.warning("Selecciona al menos un año.")
+        st.stop()
+
+    # Datos y estructuras de un año, tal como los pide el script
+    def preparar_anio(table_name):
+        clave_anio = clave_tabla(table_name)
+        if MODO_DATOS == "mysql":
+            conteos_sql(table_name, clave_anio, DIMENSIONES_CUBO, COLUMNAS_COMORBILIDAD)
+            limites_sql(table_name, clave_anio)
+            serie_diaria_sql(table_name, clave_anio)
+            acumulados_edad_sql(table_name, clave_anio)
+            return
+        df_anio = load_table_cached(table_name, columnas_dashboard, *clave_anio)
+        if not df_anio.empty:
+            cubo_casos(df_anio, table_name, clave_anio)
+            limites_tabla(df_anio, table_name, clave_anio)
+            matriz_comorbilidades(df_anio, table_name, clave_anio)
+            indice_bitmap(df_anio, table_name, clave_anio)
+            serie_diaria(df_anio, table_name, clave_anio)
+            acumulados_edad(df_anio, table_name, clave_anio)
+
+    # Los demás años se preparan en segundo plano mientras se cargan los
+    # seleccionados: después del arranque, cambiar de año no espera la carga.
+    if PRECARGA_ANIOS:
+        for anio, table_name in tablas.items():
+            if anio not in seleccion:
+                precargar(table_name, preparar_anio, table_name)
+
+    # Cada año seleccionado es una partición: los agregados se calculan por año
+    # y se combinan (ver conteos_particiones); los demás años no se consultan.
+    # La versión de la vista es la de cada una de sus tablas.
+    tablas_vista = tuple(tablas[anio] for anio in seleccion)
+    try:
+        claves = {anio: clave_tabla(tablas[anio]) for anio in seleccion}
+    except PoolAgotado:
+        st.error("MySQL está ocupado y no hay conexiones libres. Intenta de nuevo.")
+        st.stop()
+    clave = tuple(claves.values())
+
+    dfs = {}
+    cubos = []
+    limites = []
+    cargados = []
+    for anio in seleccion:
+        if MODO_DATOS == "mysql":
+            # Cada agregado se calcula en MySQL con GROUP BY y la tabla nunca se
+            # descarga; el cubo de los filtros y KPIs es una consulta más.
+            try:
+                cubos.append(
+                    conteos_sql(
+                        tablas[anio],
+                        claves[anio],
+                        DIMENSIONES_CUBO,
+                        COLUMNAS_COMORBILIDAD,
+                    )
+                )
+                limites.append(limites_sql(tablas[anio], claves[anio]))
+                cargados.append(anio)
+            except Exception as e:
+                st.error(f"Error al consultar {tablas[anio]}: {e}")
+            continue
+
+        # df es la tabla compartida entre sesiones: no se modifica en el script.
+        # Solo se recarga si la tabla se invalidó o cambió en MySQL (ver clave_tabla).
+        try:
+            df = load_table_cached(tablas[anio], columnas_dashboard, *claves[anio])
+        except Exception as e:
+            st.error(f"Error al cargar {tablas[anio]}: {e}")
+            continue
+
+        # Cubo de casos precalculado, compartido por todas las sesiones. Basta
+        # para los filtros y los KPIs, que se muestran antes que las gráficas.
+        # Los límites de las fechas de ingreso y de la edad solo leen dos
+        # columnas.
+        if not df.empty:
+            dfs[anio] = df
+            cubos.append(cubo_casos(df, tablas[anio], claves[anio]))
+            limites.append(limites_tabla(df, tablas[anio], claves[anio]))
+            cargados.append(anio)
+
+    # Serie diaria o conteos acumulados por edad de cada año cargado. No hacen
+    # falta para la barra lateral: se construyen cuando se usan, los acumulados
+    # para los KPIs con rango de edad y las series después de los KPIs.
+    def estructura_anios(en_memoria, en_mysql):
+        estructuras = []
+        for anio in cargados:
+            try:
+                if MODO_DATOS == "mysql":
+                    estructuras.append(en_mysql(tablas[anio], claves[anio]))
+                else:
+                    estructuras.append(
+                        en_memoria(dfs[anio], tablas[anio], claves[anio])
+                    )
+            except Exception as e:
+                st.error(f"Error al consultar {tablas[anio]}: {e}")
+        return estructuras
+
+    cubo = combinar_conteos(cubos, DIMENSIONES_CUBO) if cubos else pd.DataFrame()
+
+    if not cubo.empty:
+        st.success("Datos cargados correctamente.")
+
+        st.sidebar.header("Filtros")
+
+        regiones = cubo["REGION"].dropna().unique()
+        region_seleccionada = st.sidebar.selectbox(
+            "Selecciona una Región", sorted(regiones)
+        )
 
-    df_filtrado = df[
-        (df["REGION"] == region_seleccionada) & (df["ENTIDAD"] == entidad_seleccionada)
-    ]
-
-    if st.sidebar.button("Actualizar datos"):
-        if "cache_dfs" in st.session_state:
-            del st.session_state.cache_dfs[seleccion]
-    st.cache_data.clear()
-
-else:
-    st.warning("La tabla está vacía o ocurrió un error al cargar los datos.")
-
-# KPIs
-encabezado_grafica("Indicadores Clave de Desempeño (KPIs)")
-
-# Filtrados para los KPIs
-df_confirmados = df_filtrado[df_filtrado["CLASIFICACION_FINAL"] == 1]
-total_confirmados = len(df_confirmados)
-total_negativos = len(df_filtrado[df_filtrado["CLASIFICACION_FINAL"] == 2])
-total_sospechosos = len(df_filtrado[df_filtrado["CLASIFICACION_FINAL"] == 3])
-
-defunciones = df_confirmados[
-    df_confirmados["FECHA_DEF"].notna() & (df_confirmados["FECHA_DEF"] != "9999-99-99")
-]
-total_defunciones = len(defunciones)
+        entidades = (
+            filtrar_cubo(cubo, REGION=region_seleccionada)["ENTIDAD"].dropna().unique()
+        )
+        entidad_seleccionada = st.sidebar.selectbox(
+            "Selecciona una Entidad Federativa", sorted(entidades)
+        )
 
+        filtros = {"REGION": region_seleccionada, "ENTIDAD": entidad_seleccionada}
+
+        # Los controles de rango vuelven al rango completo cuando cambian sus
+        # límites (otros años seleccionados); si no, conservarían el rango de la
+        # vista anterior.
+        def reiniciar_control(key, limites):
+            if st.session_state.get(f"{key}_limites") != limites:
+                st.session_state[f"{key}_limites"] = limites
+                st.session_state.pop(key, None)
+
+        # Periodo de fechas de ingreso; con el rango completo no se aplica
+        periodo = None
+        rango, limite_edad = combinar_limites(limites)
+        if rango is not None:
+            fecha_min, fecha_max = (fecha.astype(object) for fecha in rango)
+            reiniciar_control("periodo", (fecha_min, fecha_max))
+            fechas_seleccionadas = st.sidebar.date_input(
+                "Fechas de ingreso",
+                value=(fecha_min, fecha_max),
+                min_value=fecha_min,
+                max_value=fecha_max,
+                key="periodo",
+            )
+            if len(fechas_seleccionadas) == 2 and tuple(fechas_seleccionadas) != (
+                fecha_min,
+                fecha_max,
+            ):
+                periodo = tuple(fecha.isoformat() for fecha in fechas_seleccionadas)
+
+        # Rango de edad; con el rango completo no se aplica
+        rango_edad = None
+        if limite_edad is not None:
+            reiniciar_control("rango_edad", limite_edad)
+            seleccion_edad = st.sidebar.slider(
+                "Rango de edad", 0, limite_edad, (0, limite_edad), key="rango_edad"
+            )
+            if seleccion_edad != (0, limite_edad):
+                rango_edad = seleccion_edad
+
+        # Rangos {columna: (desde, hasta)} que limitan toda la vista
+        rangos = {}
+        if periodo is not None:
+            rangos["FECHA_INGRESO"] = periodo
+        if rango_edad is not None:
+            rangos["EDAD"] = rango_edad
+
+        # Filtros de la vista: forman parte de la clave de cada figura
+        vista = {**filtros, "RANGOS": rangos}
+
+        if dfs and st.sidebar.checkbox("Mostrar uso de memoria", key="reporte_memoria"):
+            for anio, df in dfs.items():
+                st.sidebar.caption(tablas[anio])
+                st.sidebar.dataframe(reporte_memoria(df))
+
+        if st.sidebar.button("Actualizar datos"):
+            for table_name in tablas_vista:
+                invalidar_tabla(table_name)
+            st.rerun()
+
+    else:
+        st.warning("La tabla está vacía o ocurrió un error al cargar los datos.")
+        st.stop()
+
+    # KPIs
+    encabezado_grafica("Indicadores Clave de Desempeño (KPIs)")
+
+    # Conteos agrupados de las gráficas: contar_casos(grupos, medidas, **filtros)
+    # devuelve una fila por grupo con CASOS y las comorbilidades pedidas. Es el
+    # contexto de consulta de todas las gráficas: cada partición ya tiene
+    # aplicados los filtros de región y entidad y los rangos de la barra lateral.
+    def contexto_consulta():
+        particiones = {}
+        if MODO_DATOS == "mysql":
+            for anio in seleccion:
+                particiones[anio] = partial(
+                    conteos_sql, tablas[anio], claves[anio], rangos=rangos, **filtros
+                )
+        else:
+            # Matriz de comorbilidades e índice de bitmaps (los filtros por valor
+            # se resuelven sin comparar columnas). Las filas de la región, entidad
+            # y rangos se calculan una vez por tabla y selección; las gráficas
+            # solo las recorren.
+            for anio, df in dfs.items():
+                comorb = matriz_comorbilidades(df, tablas[anio], claves[anio])
+                indice = indice_bitmap(df, tablas[anio], claves[anio])
+                filas = filas_filtros(
+                    df, indice, tablas[anio], claves[anio], rangos, **filtros
+                )
+                particiones[anio] = partial(
+                    conteos_memoria, df, indice, comorb, filas=filas
+                )
+        return partial(conteos_particiones, particiones)
+
+    # KPIs a partir de las celdas del cubo de la región y entidad seleccionadas.
+    # Con rango de edad, las celdas salen de los conteos acumulados por edad (una
+    # resta por celda, sin recorrer la tabla). El cubo no tiene fechas: con un
+    # periodo las celdas salen del contexto de consulta, que entonces se construye
+    # antes de los KPIs.
+    if periodo is None and rango_edad is None:
+        celdas = filtrar_cubo(cubo, **filtros)
+    elif periodo is None:
+        acumulados = estructura_anios(acumulados_edad, acumulados_edad_sql)
+        celdas = combinar_conteos(
+            [cubo_rango_edad(a, *rango_edad, **filtros) for a in acumulados],
+            DIMENSIONES_CUBO,
+        )
+    else:
+        contar_casos = contexto_consulta()
+        celdas = contar_casos(DIMENSIONES_CUBO, COLUMNAS_COMORBILIDAD)
+    total_confirmados = contar(celdas, CLASIFICACION_FINAL=1)
+    total_negativos = contar(celdas, CLASIFICACION_FINAL=2)
+    total_sospechosos = contar(celdas, CLASIFICACION_FINAL=3)
 
-df_confirmados["FECHA_DEF"] = df_confirmados["FECHA_DEF"].astype(str)
-total_recuperados = len(df_confirmados[df_confirmados["FECHA_DEF"] == "9999-99-99"])
+    total_defunciones = contar(celdas, CLASIFICACION_FINAL=1, DEFUNCION=True)
+    total_recuperados = contar(celdas, CLASIFICACION_FINAL=1, DEFUNCION=False)
 
 
-hombres = len(df_confirmados[df_confirmados["SEXO"] == 1])
-mujeres = len(df_confirmados[df_confirmados["SEXO"] == 2])
-porc_hombres = (
-    round((hombres / total_confirmados) * 100, 1) if total_confirmados > 0 else 0
-)
-porc_mujeres = (
-    round((mujeres / total_confirmados) * 100, 1) if total_confirmados > 0 else 0
-)
+    hombres = contar(celdas, CLASIFICACION_FINAL=1, SEXO=1)
+    mujeres = contar(celdas, CLASIFICACION_FINAL=1, SEXO=2)
+    porc_hombres = (
+        round((hombres / total_confirmados) * 100, 1) if total_confirmados > 0 else 0
+    )
+    porc_mujeres = (
+        round((mujeres / total_confirmados) * 100, 1) if total_confirmados > 0 else 0
+    )
 
-hospitalizados = len(df_confirmados[df_confirmados["TIPO_PACIENTE"] == 2])
-ambulatorios = len(df_confirmados[df_confirmados["TIPO_PACIENTE"] == 1])
-porc_hosp = (
-    round((hospitalizados / total_confirmados) * 100, 1) if total_confirmados > 0 else 0
-)
-porc_ambu = (
-    round((ambulatorios / total_confirmados) * 100, 1) if total_confirmados > 0 else 0
-)
+    hospitalizados = contar(celdas, CLASIFICACION_FINAL=1, TIPO_PACIENTE=2)
+    ambulatorios = contar(celdas, CLASIFICACION_FINAL=1, TIPO_PACIENTE=1)
+    porc_hosp = (
+        round((hospitalizados / total_confirmados) * 100, 1)
+        if total_confirmados > 0
+        else 0
+    )
+    porc_ambu = (
+        round((ambulatorios / total_confirmados) * 100, 1)
+        if total_confirmados > 0
+        else 0
+    )
 
 
-def porcentaje_condicion(col):
-    if col in df_confirmados.columns:
-        return round(
-            (len(df_confirmados[df_confirmados[col] == 1]) / total_confirmados) * 100, 1
-        )
-    return 0
-
-comorbilidades = {
-    "Diabetes": porcentaje_condicion("DIABETES"),
-    "Hipertensión": porcentaje_condicion("HIPERTENSION"),
-    "Obesidad": porcentaje_condicion("OBESIDAD"),
-    "Renal Crónica": porcentaje_condicion("RENAL_CRONICA"),
-    "Cardiovascular": porcentaje_condicion("CARDIOVASCULAR"),
-    "Tabaquismo": porcentaje_condicion("TABAQUISMO"),
-}
+    def porcentaje_condicion(col):
+        if col in celdas.columns and total_confirmados > 0:
+            return round(
+                (contar(celdas, col, CLASIFICACION_FINAL=1) / total_confirmados) * 100,
+                1,
+            )
+        return 0
+
+    comorbilidades = {
+        "Diabetes": porcentaje_condicion("DIABETES"),
+        "Hipertensión": porcentaje_condicion("HIPERTENSION"),
+        "Obesidad": porcentaje_condicion("OBESIDAD"),
+        "Renal Crónica": porcentaje_condicion("RENAL_CRONICA"),
+        "Cardiovascular": porcentaje_condicion("CARDIOVASCULAR"),
+        "Tabaquismo": porcentaje_condicion("TABAQUISMO"),
+    }
 
-# Dividir los KPIs en columnas
-color_confirmados = "#e74c3c"  # Rojo
-color_negativos = "#3498db"  # Azul
-color_sospechosos = "#f39c12"  # Naranja
-color_defunciones = "#7f8c8d"  # Gris
-color_recuperados = "#e67e22"  # Naranja oscuro
-color_activos = "#2ecc71"  # Verde
+    # Dividir los KPIs en columnas
+    color_confirmados = "#e74c3c"  # Rojo
+    color_negativos = "#3498db"  # Azul
+    color_sospechosos = "#f39c12"  # Naranja
+    color_defunciones = "#7f8c8d"  # Gris
+    color_recuperados = "#e67e22"  # Naranja oscuro
+    color_activos = "#2ecc71"  # Verde
 
-# Formateo de números
-def format_number(num):
-    return f"{num:,}".replace(",", ",")
+    # Formateo de números
+    def format_number(num):
+        return f"{num:,}".replace(",", ",")
 
 
-st.markdown(
-    """
+    st.markdown(
+        """
 <style>
 .kpi-card {
     background-color: #1e1e2f;
@@ -215,13 +459,13 @@ st.markdown(
 </style>
 <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
 """,
-    unsafe_allow_html=True,
-)
+        unsafe_allow_html=True,
+    )
 
-col1, col2, col3 = st.columns(3)
-with col1:
-    st.markdown(
-        f"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown(
+            f"""
         <div class="kpi-card">
             <div class="kpi-left-border" style="background-color: {color_confirmados};"></div>
             <div class="kpi-icon"><i class="fas fa-virus"></i></div>
@@ -230,11 +474,11 @@ with col1:
             <div class="kpi-subtitle">Casos acumulados</div>
         </div>
     """,
-        unsafe_allow_html=True,
-    )
-with col2:
-    st.markdown(
-        f"""
+            unsafe_allow_html=True,
+        )
+    with col2:
+        st.markdown(
+            f"""
         <div class="kpi-card">
             <div class="kpi-left-border" style="background-color: {color_negativos};"></div>
             <div class="kpi-icon"><i class="fas fa-shield-virus"></i></div>
@@ -243,11 +487,11 @@ with col2:
             <div class="kpi-subtitle">Casos acumulados</div>
         </div>
     """,
-        unsafe_allow_html=True,
-    )
-with col3:
-    st.markdown(
-        f"""
+            unsafe_allow_html=True,
+        )
+    with col3:
+        st.markdown(
+            f"""
         <div class="kpi-card">
             <div class="kpi-left-border" style="background-color: {color_sospechosos};"></div>
             <div class="kpi-icon"><i class="fas fa-question-circle"></i></div>
@@ -256,13 +500,13 @@ with col3:
             <div class="kpi-subtitle">Casos acumulados</div>
         </div>
     """,
-        unsafe_allow_html=True,
-    )
+            unsafe_allow_html=True,
+        )
 
-col4, col5, col6 = st.columns(3)
-with col4:
-    st.markdown(
-        f"""
+    col4, col5, col6 = st.columns(3)
+    with col4:
+        st.markdown(
+            f"""
         <div class="kpi-card">
             <div class="kpi-left-border" style="background-color: {color_defunciones};"></div>
             <div class="kpi-icon"><i class="fas fa-procedures"></i></div>
@@ -271,11 +515,11 @@ with col4:
             <div class="kpi-subtitle">Acumulados</div>
         </div>
     """,
-        unsafe_allow_html=True,
-    )
-with col5:
-    st.markdown(
-        f"""
+            unsafe_allow_html=True,
+        )
+    with col5:
+        st.markdown(
+            f"""
         <div class="kpi-card">
             <div class="kpi-left-border" style="background-color: {color_recuperados};"></div>
             <div class="kpi-icon"><i class="fas fa-heartbeat"></i></div>
@@ -284,11 +528,11 @@ with col5:
             <div class="kpi-subtitle">Acumulados</div>
         </div>
     """,
-        unsafe_allow_html=True,
-    )
-with col6:
-    st.markdown(
-        f"""
+            unsafe_allow_html=True,
+        )
+    with col6:
+        st.markdown(
+            f"""
         <div class="kpi-card">
             <div class="kpi-left-border" style="background-color: {color_activos};"></div>
             <div class="kpi-icon"><i class="fas fa-user-friends"></i></div>
@@ -297,13 +541,13 @@ with col6:
             <div class="kpi-subtitle">Distribución por género</div>
         </div>
     """,
-        unsafe_allow_html=True,
-    )
+            unsafe_allow_html=True,
+        )
 
-col7, col8 = st.columns(2)
-with col7:
-    st.markdown(
-        f"""
+    col7, col8 = st.columns(2)
+    with col7:
+        st.markdown(
+            f"""
         <div class="kpi-card">
             <div class="kpi-left-border" style="background-color: {color_defunciones};"></div>
             <div class="kpi-icon"><i class="fas fa-hospital"></i></div>
@@ -312,11 +556,11 @@ with col7:
             <div class="kpi-subtitle">Del total de confirmados</div>
         </div>
     """,
-        unsafe_allow_html=True,
-    )
-with col8:
-    st.markdown(
-        f"""
+            unsafe_allow_html=True,
+        )
+    with col8:
+        st.markdown(
+            f"""
         <div class="kpi-card">
             <div class="kpi-left-border" style="background-color: {color_activos};"></div>
             <div class="kpi-icon"><i class="fas fa-home"></i></div>
@@ -325,56 +569,56 @@ with col8:
             <div class="kpi-subtitle">Del total de confirmados</div>
         </div>
     """,
-        unsafe_allow_html=True,
-    )
-
-divisor_visual();
+            unsafe_allow_html=True,
+        )
 
-# Porcentaje de comorbilidades
-encabezado_grafica("Comorbilidades Principales")
+    divisor_visual();
 
-cols = st.columns(len(comorbilidades))
-sorted_comorbilidades = dict(
-    sorted(comorbilidades.items(), key=lambda item: item[1], reverse=True)
-)
+    # Porcentaje de comorbilidades
+    encabezado_grafica("Comorbilidades Principales")
 
-for i, (nombre, valor) in enumerate(sorted_comorbilidades.items()):
-    with cols[i]:
-        st.markdown(f"**{nombre.upper()}**")
-        if valor > 10:
-            color = "#d73027"  # Rojo para valores altos
-        elif valor > 7:
-            color = "#fc8d59"  # Naranja para valores medios
-        else:
-            color = "#91bfdb"  # Azul para valores bajos
+    cols = st.columns(len(comorbilidades))
+    sorted_comorbilidades = dict(
+        sorted(comorbilidades.items(), key=lambda item: item[1], reverse=True)
+    )
 
-        st.markdown(f"{valor:.2f} %")
-        st.markdown(
-            f"""
+    for i, (nombre, valor) in enumerate(sorted_comorbilidades.items()):
+        with cols[i]:
+            st.markdown(f"**{nombre.upper()}**")
+            if valor > 10:
+                color = "#d73027"  # Rojo para valores altos
+            elif valor > 7:
+                color = "#fc8d59"  # Naranja para valores medios
+            else:
+                color = "#91bfdb"  # Azul para valores bajos
+
+            st.markdown(f"{valor:.2f} %")
+            st.markdown(
+                f"""
             <div style="background-color: #f0f0f0; border-radius: 3px; height: 10px; width: 100%;">
                 <div style="background-color: {color}; width: {min(valor*2, 100)}%; height: 100%; border-radius: 3px;"></div>
             </div>
             """,
-            unsafe_allow_html=True,
-        )
+                unsafe_allow_html=True,
+            )
 
-suma_total = sum(sorted_comorbilidades.values())
+    suma_total = sum(sorted_comorbilidades.values())
 
 
-st.markdown(
-    "<hr style='margin: 15px 0 10px 0; border: 0; border-top: 1px solid #ccc;'>",
-    unsafe_allow_html=True,
-)
+    st.markdown(
+        "<hr style='margin: 15px 0 10px 0; border: 0; border-top: 1px solid #ccc;'>",
+        unsafe_allow_html=True,
+    )
 
 
-st.markdown("<div style='padding: 8px 0;'>", unsafe_allow_html=True)
-col1, col2 = st.columns([1, 3])
-with col1:
-    st.markdown(f"**TOTAL DE LA POBLACIÓN**")
-    st.markdown(f"{suma_total:.2f} %")
-with col2:
-    st.markdown(
-        f"""
+    st.markdown("<div style='padding: 8px 0;'>", unsafe_allow_html=True)
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        st.markdown(f"**TOTAL DE LA POBLACIÓN**")
+        st.markdown(f"{suma_total:.2f} %")
+    with col2:
+        st.markdown(
+            f"""
         <div style="background-color: #f0f0f0; border-radius: 3px; height: 12px; width: 100%; margin-top: 22px;">
             <div style="background: linear-gradient(90deg, #d73027, #fc8d59, #91bfdb); 
                         width: {min(suma_total, 100)}%; 
@@ -382,1208 +626,750 @@ with col2:
                         border-radius: 3px;"></div>
         </div>
         """,
-        unsafe_allow_html=True,
-    )
-st.markdown("</div>", unsafe_allow_html=True)
+            unsafe_allow_html=True,
+        )
+    st.markdown("</div>", unsafe_allow_html=True)
 
-divisor_visual()
+    divisor_visual()
 
-# Gráfico Edad-Sexo
-col1, col2 = st.columns(2)
-with col1:
-    st.markdown(
-        """
-        <div style="background-color: #1e1e2f; border-radius: 10px; padding: 15px; margin-bottom: 20px;">
-            <h3 style="color: #ffffff; margin-top: 0; text-align: center;">Distribución Demográfica por Edad y Sexo</h3>
-        </div>
-        """,
-            unsafe_allow_html=True,
+    # Sin periodo, la matriz de comorbilidades y el índice de bitmaps solo los
+    # usan las gráficas, así que se construyen después de mostrar los KPIs.
+    if periodo is None:
+        contar_casos = contexto_consulta()
+
+    # Las curvas epidémicas salen de la serie diaria de cada año, que es la misma
+    # para cualquier filtro: contar_curva(**filtros) es un corte de las series
+    # (ver curva_diaria). Las series no tienen edad: con rango de edad la curva
+    # sale de los casos por día del contexto de consulta.
+    if rango_edad is None:
+        series = estructura_anios(serie_diaria, serie_diaria_sql)
+
+    def contar_curva(**filtros_curva):
+        if rango_edad is None:
+            series_vista = series
+        else:
+            conteos_dia = contar_casos(["FECHA_INGRESO"] + DIMENSIONES_SERIE)
+            series_vista = [construir_serie(conteos_dia, conteos_dia["CASOS"])]
+        return curva_diaria(
+            series_vista, *(periodo or (None, None)), **filtros, **filtros_curva
         )
 
-    tipo_caso = st.selectbox(
-        "Tipo de caso:",
-        ["Confirmados", "Negativos", "Sospechosos"],
-        key="grafico_tipo_caso",
-    )
+    # Las figuras que faltan en la caché se dibujan en paralelo en el pool de
+    # graficación; completar_tanda (al final del script) las coloca en orden.
+    tanda = nueva_tanda()
 
+    # Los paneles con selector propio son fragmentos: cambiar su selector vuelve
+    # a ejecutar solo el panel, no todo el script.
     tipo_map = {"Confirmados": 1, "Negativos": 2, "Sospechosos": 3}
-    tipo_color = {
-        "Confirmados": "#e74c3c",
-        "Negativos": "#3498db",
-        "Sospechosos": "#f39c12",
-    }
-    tipo_valor = tipo_map[tipo_caso]
 
-    df_tipo = df[df["CLASIFICACION_FINAL"] == tipo_valor].copy()
+    # Gráfico Edad-Sexo
+    @st.fragment
+    def panel_edad_sexo(contar_casos, table_name, clave, filtros, tanda):
+        st.markdown(
+            """
+        <div style="background-color: #1e1e2f; border-radius: 10px; padding: 15px; margin-bottom: 20px;">
+            <h3 style="color: #ffffff; margin-top: 0; text-align: center;">Distribución Demográfica por Edad y Sexo</h3>
+        </div>
+        """,
+                unsafe_allow_html=True,
+            )
+
+        tipo_caso = st.selectbox(
+            "Tipo de caso:",
+            ["Confirmados", "Negativos", "Sospechosos"],
+            key="grafico_tipo_caso",
+        )
 
-    bins = list(range(0, 100, 5)) + [100]
-    labels = [f"{i}-{i+4}" for i in range(0, 95, 5)] + ["95+"]
-    df_tipo["RANGO_EDAD"] = pd.cut(df_tipo["EDAD"], bins=bins, labels=labels, right=False)
-    df_tipo["SEXO"] = df_tipo["SEXO"].map({1: "Hombres", 2: "Mujeres"})
-
-    # Agrupar por rango de edad y sexo
-    conteo = df_tipo.groupby(["RANGO_EDAD", "SEXO"]).size().reset_index(name="CASOS")
-
-    plt.style.use("dark_background")
-    fig, ax = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
-    fig.patch.set_facecolor("#1e1e2f")
-    color_hombres = "#3498db"  # Azul para hombres
-    color_mujeres = "#e74c3c"  # Rojo para mujeres
-    bars = sns.barplot(
-        data=conteo,
-        x="RANGO_EDAD",
-        y="CASOS",
-        hue="SEXO",
-        palette={"Hombres": color_hombres, "Mujeres": color_mujeres},
-        alpha=0.8,
-        ax=ax,
-    )
-    ax.set_facecolor("#1e1e2f")
-    ax.set_title(
-        f"Distribución por Edad y Sexo - {tipo_caso}", fontsize=16, pad=20, color="white"
-    )
-    ax.set_xlabel("Rango de Edad", fontsize=12, color="white")
-    ax.set_ylabel("Número de Casos", fontsize=12, color="white")
-    plt.xticks(rotation=45, ha="right", color="white")
-    plt.yticks(color="white")
-    ax.grid(axis="y", linestyle="--", alpha=0.3, color="gray")
-    legend = ax.legend(title="Género", frameon=True, facecolor="#222244", edgecolor="gray")
-    legend.get_title().set_color("white")
-    for text in legend.get_texts():
-        text.set_color("white")
-    for bar in ax.patches:
-        bar.set_edgecolor("white")
-        bar.set_linewidth(0.5)
-    for spine in ax.spines.values():
-        spine.set_edgecolor("gray")
-        spine.set_linewidth(0.5)
-    for bar in ax.patches:
-        height = bar.get_height()
-        if height > 0:
-            if height > max(conteo["CASOS"]) * 0.05:
-                ax.text(
-                    bar.get_x() + bar.get_width() / 2.0,
-                    bar.get_height() + 5,
-                    f"{int(height):,}",
-                    ha="center",
-                    va="bottom",
-                    color="white",
-                    fontsize=8,
-                )
-    plt.tight_layout()
-    st.pyplot(fig)
+        tipo_valor = tipo_map[tipo_caso]
+
+        bins = list(range(0, 100, 5)) + [100]
+        labels = [f"{i}-{i+4}" for i in range(0, 95, 5)] + ["95+"]
+
+        # Agrupar por rango de edad y sexo
+        mostrar_figura(
+            tanda,
+            clave_figura("edad_sexo", table_name, clave, filtros, tipo_caso),
+            grafica_edad_sexo,
+            lambda: contar_por_rango_edad(
+                contar_casos(["GRUPO_EDAD", "SEXO"], CLASIFICACION_FINAL=tipo_valor),
+                "SEXO",
+                {1: "Hombres", 2: "Mujeres"},
+                bins,
+                labels,
+                "SEXO",
+                "CASOS",
+            ),
+            tipo_caso,
+        )
 
-with col2:
-# Gráfico Edad - Tipo de Paciente
-    st.markdown(
-        """
+    # Gráfico Edad - Tipo de Paciente
+    @st.fragment
+    def panel_edad_tipo_paciente(contar_casos, table_name, clave, filtros, tanda):
+        st.markdown(
+            """
     <div style="background-color: #1e1e2f; border-radius: 10px; padding: 15px; margin-bottom: 20px;">
         <h3 style="color: #ffffff; margin-top: 0; text-align: center;">Distribución por Edad y Tipo de Atención</h3>
     </div>
     """,
-        unsafe_allow_html=True,
-    )
-    
-    tipo_caso_tp = st.selectbox(
-        "Tipo de caso:",
-            ["Confirmados", "Negativos", "Sospechosos"],
-            key="grafico_tipo_paciente",
-    )
+            unsafe_allow_html=True,
+        )
 
-    tipo_valor_tp = tipo_map[tipo_caso_tp]
-    df_tipo_tp = df[df["CLASIFICACION_FINAL"] == tipo_valor_tp].copy()
+        tipo_caso_tp = st.selectbox(
+            "Tipo de caso:",
+                ["Confirmados", "Negativos", "Sospechosos"],
+                key="grafico_tipo_paciente",
+        )
 
-    df_tipo_tp["TIPO_PACIENTE"] = df_tipo_tp["TIPO_PACIENTE"].map(
-        {1: "Ambulatorios", 2: "Hospitalizados"}
-    )
-    df_tipo_tp["RANGO_EDAD"] = pd.cut(
-        df_tipo_tp["EDAD"], bins=list(range(0, 100, 5)) + [100], labels=labels, right=False
-    )
+        tipo_valor_tp = tipo_map[tipo_caso_tp]
+        labels = [f"{i}-{i+4}" for i in range(0, 95, 5)] + ["95+"]
+        mostrar_figura(
+            tanda,
+            clave_figura(
+                "edad_tipo_paciente", table_name, clave, filtros, tipo_caso_tp
+            ),
+            grafica_edad_tipo_paciente,
+            lambda: contar_por_rango_edad(
+                contar_casos(
+                    ["GRUPO_EDAD", "TIPO_PACIENTE"], CLASIFICACION_FINAL=tipo_valor_tp
+                ),
+                "TIPO_PACIENTE",
+                {1: "Ambulatorios", 2: "Hospitalizados"},
+                list(range(0, 100, 5)) + [100],
+                labels,
+                "TIPO_PACIENTE",
+                "CASOS",
+            ),
+            tipo_caso_tp,
+        )
 
-    conteo_tp = (
-        df_tipo_tp.groupby(["RANGO_EDAD", "TIPO_PACIENTE"]).size().reset_index(name="CASOS")
-    )
-    plt.style.use("dark_background")
-    fig2, ax2 = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
-    fig2.patch.set_facecolor("#1e1e2f")
-    color_ambulatorio = "#2ecc71"  # Verde para ambulatorios
-    color_hospitalizado = "#e67e22"  # Naranja para hospitalizados
-    bars = sns.barplot(
-        data=conteo_tp,
-        x="RANGO_EDAD",
-        y="CASOS",
-        hue="TIPO_PACIENTE",
-        palette={"Ambulatorios": color_ambulatorio, "Hospitalizados": color_hospitalizado},
-        alpha=0.8,
-        ax=ax2,
-    )
-    ax2.set_facecolor("#1e1e2f")
-    ax2.set_title(
-        f"Distribución por Edad y Tipo de Atención - {tipo_caso_tp}",
-        fontsize=16,
-        pad=20,
-        color="white",
-    )
-    ax2.set_xlabel("Rango de Edad", fontsize=12, color="white")
-    ax2.set_ylabel("Número de Casos", fontsize=12, color="white")
-    plt.xticks(rotation=45, ha="right", color="white")
-    plt.yticks(color="white")
-    ax2.grid(axis="y", linestyle="--", alpha=0.3, color="gray")
-    legend = ax2.legend(
-        title="Tipo de Atención", frameon=True, facecolor="#222244", edgecolor="gray"
-    )
-    legend.get_title().set_color("white")
-    for text in legend.get_texts():
-        text.set_color("white")
-    for bar in ax2.patches:
-        bar.set_edgecolor("white")
-        bar.set_linewidth(0.5)
-    for spine in ax2.spines.values():
-        spine.set_edgecolor("gray")
-        spine.set_linewidth(0.5)
-    for bar in ax2.patches:
-        height = bar.get_height()
-        if height > 0:
-            if (
-                height > max(conteo_tp["CASOS"]) * 0.05
-            ):
-                ax2.text(
-                    bar.get_x() + bar.get_width() / 2.0,
-                    bar.get_height() + 5,
-                    f"{int(height):,}",
-                    ha="center",
-                    va="bottom",
-                    color="white",
-                    fontsize=8,
-                )
 
-    plt.tight_layout()
-    st.pyplot(fig2)
-    
-divisor_visual();
-   # --- Gráfica de pastel: Porcentaje de enfermedades en casos confirmados ---
-st.markdown(
-    """
+    col1, col2 = st.columns(2)
+    with col1:
+        panel_edad_sexo(contar_casos, tablas_vista, clave, vista, tanda)
+    with col2:
+        panel_edad_tipo_paciente(contar_casos, tablas_vista, clave, vista, tanda)
+
+    divisor_visual();
+       # --- Gráfica de pastel: Porcentaje de enfermedades en casos confirmados ---
+    st.markdown(
+        """
 <div style="background-color: #1e1e2f; border-radius: 10px; padding: 15px; margin-bottom: 20px;">
     <h3 style="color: #ffffff; margin-top: 0; text-align: center;">Comorbilidades en Casos Confirmados</h3>
 </div>
 """,
-    unsafe_allow_html=True,
-)
+        unsafe_allow_html=True,
+    )
 
-# Lista de columnas de enfermedades
-columnas_enfermedades = [
-    "DIABETES",
-    "HIPERTENSION",
-    "OBESIDAD",
-    "RENAL_CRONICA",
-    "CARDIOVASCULAR",
-    "EPOC",
-    "ASMA",
-    "INMUSUPR",
-    "TABAQUISMO",
-    "OTRA_COM",
-]
-
-# Diccionario para nombres más legibles
-nombres_legibles = {
-    "DIABETES": "Diabetes",
-    "HIPERTENSION": "Hipertensión",
-    "OBESIDAD": "Obesidad",
-    "RENAL_CRONICA": "Enfermedad Renal",
-    "CARDIOVASCULAR": "Enfermedad Cardiovascular",
-    "EPOC": "EPOC",
-    "ASMA": "Asma",
-    "INMUSUPR": "Inmunosupresión",
-    "TABAQUISMO": "Tabaquismo",
-    "OTRA_COM": "Otras comorbilidades",
-}
+    # Lista de columnas de enfermedades
+    columnas_enfermedades = [
+        "DIABETES",
+        "HIPERTENSION",
+        "OBESIDAD",
+        "RENAL_CRONICA",
+        "CARDIOVASCULAR",
+        "EPOC",
+        "ASMA",
+        "INMUSUPR",
+        "TABAQUISMO",
+        "OTRA_COM",
+    ]
 
-# Contar casos donde el valor es 1 (tiene la enfermedad)
-conteo_comorbilidades = {}
-for col in columnas_enfermedades:
-    if col in df_confirmados.columns:
-        total = df_confirmados[df_confirmados[col] == 1].shape[0]
-        if total > 0:
-            conteo_comorbilidades[nombres_legibles.get(col, col)] = total
-
-# Calcular porcentajes
-suma_total = sum(conteo_comorbilidades.values())
-porcentajes = {
-    k: round((v / suma_total) * 100, 1) for k, v in conteo_comorbilidades.items()
-}
+    # Diccionario para nombres más legibles
+    nombres_legibles = {
+        "DIABETES": "Diabetes",
+        "HIPERTENSION": "Hipertensión",
+        "OBESIDAD": "Obesidad",
+        "RENAL_CRONICA": "Enfermedad Renal",
+        "CARDIOVASCULAR": "Enfermedad Cardiovascular",
+        "EPOC": "EPOC",
+        "ASMA": "Asma",
+        "INMUSUPR": "Inmunosupresión",
+        "TABAQUISMO": "Tabaquismo",
+        "OTRA_COM": "Otras comorbilidades",
+    }
 
-# Ordenar por porcentaje descendente
-porcentajes = dict(sorted(porcentajes.items(), key=lambda item: item[1], reverse=True))
-
-colors = [
-    "#3498db",
-    "#e74c3c",
-    "#2ecc71",
-    "#f39c12",
-    "#9b59b6",
-    "#1abc9c",
-    "#e67e22",
-    "#34495e",
-    "#7f8c8d",
-    "#d35400",
-]
-
-plt.style.use("dark_background")
-fig_pie, ax_pie = plt.subplots(figsize=(10, 8), facecolor="#1e1e2f")
-fig_pie.patch.set_facecolor("#1e1e2f")
-wedges, texts, autotexts = ax_pie.pie(
-    porcentajes.values(),
-    labels=None,
-    autopct="%1.1f%%",
-    startangle=90,
-    wedgeprops=dict(
-        width=0.5, edgecolor="white", linewidth=0.5
-    ),
-    pctdistance=0.95,
-    colors=colors[: len(porcentajes)],
-)
+    def agregar_comorbilidades_confirmados():
+        # Contar casos confirmados de la entidad con cada enfermedad (valor 1)
+        conteos = contar_casos([], COLUMNAS_COMORBILIDAD, CLASIFICACION_FINAL=1).iloc[0]
+        conteo_comorbilidades = {}
+        for col in columnas_enfermedades:
+            if col in conteos.index and conteos[col] > 0:
+                conteo_comorbilidades[nombres_legibles.get(col, col)] = int(
+                    conteos[col]
+                )
 
-for autotext in autotexts:
-    autotext.set_color("white")
-    autotext.set_fontsize(7)
-    autotext.set_weight("bold")
-
-centre_circle = plt.Circle((0, 0), 0.35, fc="#1e1e2f")
-ax_pie.add_patch(centre_circle)
-ax_pie.annotate(
-    "Comorbilidades",
-    xy=(0, 0),
-    ha="center",
-    va="center",
-    fontsize=14,
-    fontweight="bold",
-    color="white",
-)
+        # Calcular porcentajes
+        suma_total = sum(conteo_comorbilidades.values())
+        porcentajes = {
+            k: round((v / suma_total) * 100, 1)
+            for k, v in conteo_comorbilidades.items()
+        }
 
-ax_pie.legend(
-    wedges,
-    [f"{k} ({v}%)" for k, v in porcentajes.items()],
-    title="Comorbilidades",
-    loc="center left",
-    bbox_to_anchor=(1, 0, 0.5, 1),
-    frameon=True,
-    facecolor="#222244",
-    edgecolor="gray",
-    fontsize=10,
-)
+        # Ordenar por porcentaje descendente
+        porcentajes = dict(
+            sorted(porcentajes.items(), key=lambda item: item[1], reverse=True)
+        )
 
-ax_pie.set_title(
-    "Distribución de Comorbilidades en Casos Confirmados",
-    fontsize=16,
-    pad=20,
-    color="white",
-)
-ax_pie.axis("equal")
-
-# Información adicional
-total_casos = len(df_confirmados)
-casos_con_comorbilidad = sum(conteo_comorbilidades.values())
-porc_con_comorbilidad = round((casos_con_comorbilidad / total_casos) * 100, 1)
-
-fig_pie.text(
-    0.5,
-    0.02,
-    f"Total de casos analizados: {total_casos:,} | Casos con al menos una comorbilidad: {porc_con_comorbilidad}%",
-    ha="center",
-    color="white",
-    fontsize=10,
-    alpha=0.7,
-)
+        # Información adicional
+        total_casos = total_confirmados
+        casos_con_comorbilidad = sum(conteo_comorbilidades.values())
+        porc_con_comorbilidad = (
+            round((casos_con_comorbilidad / total_casos) * 100, 1)
+            if total_casos > 0
+            else 0
+        )
+        return porcentajes, total_casos, porc_con_comorbilidad
 
-st.pyplot(fig_pie)
-# =================== DIVISOR VISUAL ===================
-divisor_visual();
 
-col1, col2 = st.columns(2)
-with col1:
-# === Gráfico de Línea - Intubados por mes (empezando en 0 en enero y febrero) ===
-    st.markdown(
-        """
+    mostrar_figura(
+        tanda,
+        clave_figura("comorbilidades_confirmados", tablas_vista, clave, vista),
+        grafica_comorbilidades_confirmados,
+        agregar_comorbilidades_confirmados,
+    )
+    # =================== DIVISOR VISUAL ===================
+    divisor_visual();
+
+    col1, col2 = st.columns(2)
+    with col1:
+            # === Gráfico de Línea - Intubados por mes (empezando en 0 en enero y febrero) ===
+        st.markdown(
+            """
     <div style="background-color: #1e1e2f; border-radius: 10px; padding: 15px; margin-bottom: 20px;">
         <h3 style="color: #ffffff; margin-top: 0; text-align: center;">Evolución Mensual de Pacientes Intubados</h3>
     </div>
     """,
-        unsafe_allow_html=True,
-    )
-
-    df["FECHA_INGRESO"] = pd.to_datetime(df["FECHA_INGRESO"], errors="coerce")
-    df_intubado = df[df["FECHA_INGRESO"].notna() & df["INTUBADO"].isin([1, 2])].copy()
-
-    df_intubado["MES"] = df_intubado["FECHA_INGRESO"].dt.month
-    conteo_real = (
-        df_intubado[df_intubado["MES"] >= 3]
-        .groupby(["MES", "INTUBADO"])
-        .size()
-        .reset_index(name="PACIENTES")
-    )
-    meses_cero = pd.DataFrame(
-        [
-            {"MES": mes, "INTUBADO": estado, "PACIENTES": 0}
-            for mes in [1, 2]
-            for estado in [1, 2]
-        ]
-    )
-
-    # Unir conteos
-    conteo_completo = pd.concat([meses_cero, conteo_real], ignore_index=True)
-
-    # Pivotear
-    pivot_intubado = conteo_completo.pivot(
-        index="MES", columns="INTUBADO", values="PACIENTES"
-    ).fillna(0)
-
-    # Asegurar que todos los meses del 1 al 12 estén presentes
-    for mes in range(1, 13):
-        if mes not in pivot_intubado.index:
-            pivot_intubado.loc[mes] = [0, 0]
-    pivot_intubado = pivot_intubado.sort_index()
-
-    etiquetas = {1: "Sí", 2: "No"}
-    labels = [
-        "Ene",
-        "Feb",
-        "Mar",
-        "Abr",
-        "May",
-        "Jun",
-        "Jul",
-        "Ago",
-        "Sep",
-        "Oct",
-        "Nov",
-        "Dic",
-    ]
-
-    plt.style.use("dark_background")
-    fig, ax = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
-    fig.patch.set_facecolor("#1e1e2f")
-    color_intubado_si = "#e74c3c"  # Rojo para intubados
-    color_intubado_no = "#2ecc71"  # Verde para no intubados
-    colores = {1: color_intubado_si, 2: color_intubado_no}
-    for col in pivot_intubado.columns:
-        ax.plot(
-            pivot_intubado.index,
-            pivot_intubado[col],
-            marker="o",
-            markersize=8,
-            linewidth=3,
-            color=colores.get(col, "#ffffff"),
-            label=f"Intubado: {etiquetas.get(col, col)}",
-            alpha=0.9,
+            unsafe_allow_html=True,
         )
-    ax.set_facecolor("#1e1e2f")
-    ax.set_title(
-        "Evolución Mensual de Pacientes Intubados", fontsize=18, pad=20, color="white"
-    )
-    ax.set_xlabel("Mes", fontsize=14, color="white", labelpad=10)
-    ax.set_ylabel("Número de Pacientes", fontsize=14, color="white", labelpad=10)
-    ax.set_xticks(range(1, 13))
-    ax.set_xticklabels(labels, color="white", fontsize=12)
-    ax.tick_params(axis="y", colors="white", labelsize=12)
-    ax.grid(axis="both", linestyle="--", alpha=0.3, color="gray")
-
-    legend = ax.legend(
-        title="Estado de Intubación",
-        frameon=True,
-        facecolor="#222244",
-        edgecolor="gray",
-        fontsize=12,
-        loc="upper left",
-    )
-    legend.get_title().set_color("white")
-    legend.get_title().set_fontsize(13)
-    for text in legend.get_texts():
-        text.set_color("white")
-
-    for col in pivot_intubado.columns:
-        for mes, valor in enumerate(pivot_intubado[col], 1):
-            if valor > 0:
-                ax.annotate(
-                    f"{int(valor):,}",
-                    xy=(mes, valor),
-                    xytext=(
-                        0,
-                        10 if col == 1 else -20,
-                    ),
-                    textcoords="offset points",
-                    ha="center",
-                    va="bottom" if col == 1 else "top",
-                    color="white",
-                    fontsize=9,
-                    bbox=dict(boxstyle="round,pad=0.3", fc="#222244", alpha=0.7, ec="gray"),
-                )
 
-    for spine in ax.spines.values():
-        spine.set_edgecolor("gray")
-        spine.set_linewidth(0.5)
-
-    plt.tight_layout()
+        def agregar_intubados_mes():
+            # Pacientes por mes de ingreso (SIN_DATO si no hay fecha) e intubación
+            conteo_real = contar_casos(["MES_INGRESO", "INTUBADO"], INTUBADO=[1, 2])
+            conteo_real = conteo_real.rename(
+                columns={"MES_INGRESO": "MES", "CASOS": "PACIENTES"}
+            )
+            conteo_real = conteo_real[conteo_real["MES"] >= 3]
+            meses_cero = pd.DataFrame(
+                [
+                    {"MES": mes, "INTUBADO": estado, "PACIENTES": 0}
+                    for mes in [1, 2]
+                    for estado in [1, 2]
+                ]
+            )
 
-    st.pyplot(fig)
+            # Unir conteos
+            conteo_completo = pd.concat([meses_cero, conteo_real], ignore_index=True)
+
+            # Pivotear
+            pivot_intubado = conteo_completo.pivot(
+                index="MES", columns="INTUBADO", values="PACIENTES"
+            ).fillna(0)
+
+            # Asegurar que todos los meses del 1 al 12 estén presentes
+            for mes in range(1, 13):
+                if mes not in pivot_intubado.index:
+                    pivot_intubado.loc[mes] = [0, 0]
+            return pivot_intubado.sort_index()
+
+        mostrar_figura(
+            tanda,
+            clave_figura("intubados_mes", tablas_vista, clave, vista),
+            grafica_intubados_mes,
+            agregar_intubados_mes,
+        )
 
 
-with col2:
-# --- Distribución por Edad en Rangos (Histograma) ---
-    st.markdown(
-        """
+    with col2:
+            # --- Distribución por Edad en Rangos (Histograma) ---
+        st.markdown(
+            """
     <div style="background-color: #1e1e2f; border-radius: 10px; padding: 15px; margin-bottom: 20px;">
         <h3 style="color: #ffffff; margin-top: 0; text-align: center;">Distribución de Casos Sospechosos por Mes</h3>
     </div>
     """,
-        unsafe_allow_html=True,
-    )
+            unsafe_allow_html=True,
+        )
 
-    # Convertir fecha y filtrar clasificaciones válidas
-    df_sospechosos = df.copy()
-    df_sospechosos["FECHA_INGRESO"] = pd.to_datetime(
-        df_sospechosos["FECHA_INGRESO"], errors="coerce"
-    )
-    df_sospechosos = df_sospechosos[df_sospechosos["CLASIFICACION_FINAL"].isin([3, 6, 7])]
-    df_sospechosos = df_sospechosos[df_sospechosos["FECHA_INGRESO"].notna()].copy()
-
-    # Extraer mes
-    df_sospechosos["MES"] = df_sospechosos["FECHA_INGRESO"].dt.month
-
-    # Conteo real desde abril en adelante
-    conteo_real = (
-        df_sospechosos[df_sospechosos["MES"] >= 4]
-        .groupby(["MES", "CLASIFICACION_FINAL"])
-        .size()
-        .reset_index(name="PACIENTES")
-    )
+        def agregar_sospechosos_mes():
+            # Casos por mes de ingreso de las clasificaciones válidas
+            conteo_real = contar_casos(
+                ["MES_INGRESO", "CLASIFICACION_FINAL"], CLASIFICACION_FINAL=[3, 6, 7]
+            )
+            conteo_real = conteo_real.rename(
+                columns={"MES_INGRESO": "MES", "CASOS": "PACIENTES"}
+            )
 
-    # Agregar ceros para enero-marzo
-    meses_cero = pd.DataFrame(
-        [
-            {"MES": mes, "CLASIFICACION_FINAL": clasif, "PACIENTES": 0}
-            for mes in [1, 2, 3]
-            for clasif in [3, 6, 7]
-        ]
-    )
+            # Conteo real desde abril en adelante
+            conteo_real = conteo_real[conteo_real["MES"] >= 4]
 
-    # Combinar conteos
-    conteo_completo = pd.concat([meses_cero, conteo_real], ignore_index=True)
-    pivotado = conteo_completo.pivot(
-        index="MES", columns="CLASIFICACION_FINAL", values="PACIENTES"
-    ).fillna(0)
-
-    # Asegurar que todos los meses del 1 al 12 estén presentes
-    for mes in range(1, 13):
-        if mes not in pivotado.index:
-            pivotado.loc[mes] = [0, 0, 0]
-    pivotado = pivotado.sort_index()
-
-    # Etiquetas y colores mejorados
-    labels = [
-        "Ene",
-        "Feb",
-        "Mar",
-        "Abr",
-        "May",
-        "Jun",
-        "Jul",
-        "Ago",
-        "Sep",
-        "Oct",
-        "Nov",
-        "Dic",
-    ]
-    colores_clasif = {3: "#f39c12", 6: "#3498db", 7: "#2ecc71"}  # Naranja  # Azul  # Verde
-    nombres_clasif = {3: "Sospechoso", 6: "Probable", 7: "Negativo"}
-
-    plt.style.use("dark_background")
-    fig, ax = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
-    fig.patch.set_facecolor("#1e1e2f")
-
-    x = np.arange(len(labels))
-    width = 0.25
-    offset = 0
-    for i, clasif in enumerate(pivotado.columns):
-        bars = ax.bar(
-            x + offset,
-            pivotado[clasif],
-            width,
-            label=nombres_clasif.get(clasif, f"Clase {clasif}"),
-            color=colores_clasif.get(clasif, "#ffffff"),
-            edgecolor="white",
-            linewidth=0.5,
-            alpha=0.8,
+            # Agregar ceros para enero-marzo
+            meses_cero = pd.DataFrame(
+                [
+                    {"MES": mes, "CLASIFICACION_FINAL": clasif, "PACIENTES": 0}
+                    for mes in [1, 2, 3]
+                    for clasif in [3, 6, 7]
+                ]
+            )
+
+            # Combinar conteos
+            conteo_completo = pd.concat([meses_cero, conteo_real], ignore_index=True)
+            pivotado = conteo_completo.pivot(
+                index="MES", columns="CLASIFICACION_FINAL", values="PACIENTES"
+            ).fillna(0)
+
+            # Asegurar que todos los meses del 1 al 12 estén presentes
+            for mes in range(1, 13):
+                if mes not in pivotado.index:
+                    pivotado.loc[mes] = [0, 0, 0]
+            return pivotado.sort_index()
+
+        mostrar_figura(
+            tanda,
+            clave_figura("sospechosos_mes", tablas_vista, clave, vista),
+            grafica_sospechosos_mes,
+            agregar_sospechosos_mes,
         )
 
-        umbral = (
-            max(pivotado[clasif]) * 0.1
-        )  # Solo mostrar valores para barras con > 10% del máximo
-        for j, bar in enumerate(bars):
-            height = bar.get_height()
-            if height > umbral:
-                ax.text(
-                    bar.get_x() + bar.get_width() / 2,
-                    height + 5,
-                    f"{int(height):,}",
-                    ha="center",
-                    va="bottom",
-                    color="white",
-                    fontsize=8,
-                    rotation=0,
-                    bbox=dict(boxstyle="round,pad=0.2", fc="#222244", alpha=0.7, ec="gray"),
+    # =================== DIVISOR VISUAL ===================
+    divisor_visual();
+
+    # --- Curva epidémica diaria, semanal o mensual ---
+    frecuencias_curva = {"Diaria": "D", "Semanal": "W", "Mensual": "MS"}
+    ventanas_curva = {"Sin promedio": None, "7 días": 7, "14 días": 14}
+
+
+    @st.fragment
+    def panel_curva_epidemica(contar_curva, table_name, clave, filtros, tanda):
+        encabezado_grafica("Curva Epidémica por Fecha de Ingreso")
+
+        col_tipo, col_frecuencia, col_ventana = st.columns(3)
+        with col_tipo:
+            tipo_caso = st.selectbox(
+                "Tipo de caso:", list(tipo_map), key="curva_tipo_caso"
+            )
+        with col_frecuencia:
+            frecuencia = st.radio(
+                "Frecuencia:",
+                list(frecuencias_curva),
+                horizontal=True,
+                key="curva_frecuencia",
+            )
+        with col_ventana:
+            # El promedio móvil es de días: solo aplica a la curva diaria
+            ventana = st.selectbox(
+                "Promedio móvil:",
+                list(ventanas_curva),
+                key="curva_ventana",
+                disabled=frecuencia != "Diaria",
+            )
+        if frecuencia != "Diaria":
+            ventana = "Sin promedio"
+
+        def agregar_curva_epidemica():
+            curva = {}
+            for col, extra in [("CASOS", {}), ("DEFUNCIONES", {"DEFUNCION": True})]:
+                conteo, promedio = agregar_curva(
+                    contar_curva(CLASIFICACION_FINAL=tipo_map[tipo_caso], **extra),
+                    frecuencias_curva[frecuencia],
+                    ventanas_curva[ventana],
                 )
-        offset += width
-
-    ax.set_facecolor("#1e1e2f")
-    ax.set_title(
-        "Evolución Mensual de Casos por Tipo de Clasificación",
-        fontsize=16,
-        pad=20,
-        color="white",
-    )
-    ax.set_xlabel("Mes", fontsize=12, color="white")
-    ax.set_ylabel("Número de Pacientes", fontsize=12, color="white")
-    ax.set_xticks(x + width)
-    ax.set_xticklabels(labels, color="white")
-    ax.tick_params(axis="y", colors="white")
-    ax.grid(axis="y", linestyle="--", alpha=0.3, color="gray")
-    legend = ax.legend(
-        title="Clasificación Final",
-        frameon=True,
-        facecolor="#222244",
-        edgecolor="gray",
-        fontsize=10,
-        loc="upper left",
-    )
-    legend.get_title().set_color("white")
-    for text in legend.get_texts():
-        text.set_color("white")
-    for spine in ax.spines.values():
-        spine.set_edgecolor("gray")
-        spine.set_linewidth(0.5)
-
-    plt.tight_layout()
-    st.pyplot(fig)
-    
-# =================== DIVISOR VISUAL ===================
-divisor_visual();
-
-# --- Gráfico de barras horizontales: comorbilidades en confirmados o fallecidos ---
-encabezado_grafica("Comorbilidades en Casos Confirmados o Fallecidos")
-
-# Selector de tipo de analisis
-tipo_comparacion = st.radio(
-    "Selecciona el grupo a analizar:",
-    ("Casos Confirmados", "Casos Fallecidos"),
-    horizontal=True,
-    key="comorbilidades_tipo",
-)
+                curva[col] = conteo
+                if promedio is not None:
+                    curva[f"PROMEDIO_{col}"] = promedio
+            return pd.DataFrame(curva).fillna(0)
+
+        mostrar_figura(
+            tanda,
+            clave_figura(
+                "curva_epidemica",
+                table_name,
+                clave,
+                filtros,
+                tipo_caso,
+                frecuencia,
+                ventana,
+            ),
+            grafica_curva_epidemica,
+            agregar_curva_epidemica,
+            tipo_caso,
+            frecuencia,
+        )
 
-# Filtrar DataFrame según la selección
-if tipo_comparacion == "Casos Confirmados":
-    df_comorbilidad = df[df["CLASIFICACION_FINAL"] == 1].copy()
-    color_base = "#3498db"  # Azul para confirmados
-else:
-    df_comorbilidad = df[
-        (df["CLASIFICACION_FINAL"] == 1)
-        & (df["FECHA_DEF"].notna())
-        & (df["FECHA_DEF"] != "9999-99-99")
-    ].copy()
-    color_base = "#e74c3c"  # Rojo para fallecidos
-
-# Columnas de comorbilidades
-columnas_comorb = [
-    "DIABETES",
-    "HIPERTENSION",
-    "OBESIDAD",
-    "EPOC",
-    "ASMA",
-    "CARDIOVASCULAR",
-    "RENAL_CRONICA",
-    "TABAQUISMO",
-    "INMUSUPR",
-    "OTRA_COM",
-]
-
-# Diccionario para nombres más legibles
-nombres_legibles = {
-    "DIABETES": "Diabetes",
-    "HIPERTENSION": "Hipertensión",
-    "OBESIDAD": "Obesidad",
-    "RENAL_CRONICA": "Enfermedad Renal",
-    "CARDIOVASCULAR": "Enfermedad Cardiovascular",
-    "EPOC": "EPOC",
-    "ASMA": "Asma",
-    "INMUSUPR": "Inmunosupresión",
-    "TABAQUISMO": "Tabaquismo",
-    "OTRA_COM": "Otras comorbilidades",
-}
 
-# Calcular frecuencias (solo donde el valor es 1)
-frecuencias = {
-    nombres_legibles.get(col, col): df_comorbilidad[df_comorbilidad[col] == 1].shape[0]
-    for col in columnas_comorb
-    if col in df_comorbilidad.columns
-}
+    panel_curva_epidemica(contar_curva, tablas_vista, clave, vista, tanda)
 
-# Calcular porcentajes sobre el total de pacientes
-total_pacientes = len(df_comorbilidad)
-porcentajes = {k: (v / total_pacientes) * 100 for k, v in frecuencias.items()}
-
-# Convertir a DataFrame y ordenar
-df_comorb_plot = pd.DataFrame({"Pacientes": frecuencias, "Porcentaje": porcentajes})
-df_comorb_plot = df_comorb_plot.sort_values(by="Pacientes", ascending=True)
-
-plt.style.use("dark_background")
-fig, ax = plt.subplots(figsize=(12, 8), facecolor="#1e1e2f")
-fig.patch.set_facecolor("#1e1e2f")
-cmap = plt.cm.get_cmap("YlOrRd" if tipo_comparacion == "Casos Fallecidos" else "YlGnBu")
-colors = cmap(np.linspace(0.3, 1.0, len(df_comorb_plot)))
-bars = ax.barh(
-    df_comorb_plot.index,
-    df_comorb_plot["Pacientes"],
-    color=colors,
-    edgecolor="white",
-    linewidth=0.5,
-    alpha=0.8,
-)
+    # =================== DIVISOR VISUAL ===================
+    divisor_visual();
 
-ax.set_facecolor("#1e1e2f")
-ax.set_title(
-    f"Comorbilidades en {tipo_comparacion}", fontsize=16, pad=20, color="white"
-)
-ax.set_xlabel("Número de Pacientes", fontsize=12, color="white")
-ax.set_ylabel("Comorbilidad", fontsize=12, color="white")
-for i, bar in enumerate(bars):
-    width = bar.get_width()
-    label_text = f"{int(width):,} ({df_comorb_plot['Porcentaje'].iloc[i]:.1f}%)"
-    ax.text(
-        width
-        + (
-            max(df_comorb_plot["Pacientes"]) * 0.02
-        ),
-        bar.get_y() + bar.get_height() / 2,
-        label_text,
-        va="center",
-        ha="left",
-        color="white",
-        fontsize=10,
-        bbox=dict(boxstyle="round,pad=0.3", fc="#222244", alpha=0.7, ec="gray"),
-    )
+    # --- Gráfico de barras horizontales: comorbilidades en confirmados o fallecidos ---
+    @st.fragment
+    def panel_comorbilidades_grupo(contar_casos, table_name, clave, filtros, tanda):
+        encabezado_grafica("Comorbilidades en Casos Confirmados o Fallecidos")
+
+        # Selector de tipo de analisis
+        tipo_comparacion = st.radio(
+            "Selecciona el grupo a analizar:",
+            ("Casos Confirmados", "Casos Fallecidos"),
+            horizontal=True,
+            key="comorbilidades_tipo",
+        )
+
+        # Columnas de comorbilidades
+        columnas_comorb = [
+            "DIABETES",
+            "HIPERTENSION",
+            "OBESIDAD",
+            "EPOC",
+            "ASMA",
+            "CARDIOVASCULAR",
+            "RENAL_CRONICA",
+            "TABAQUISMO",
+            "INMUSUPR",
+            "OTRA_COM",
+        ]
+
+        # Diccionario para nombres más legibles
+        nombres_legibles = {
+            "DIABETES": "Diabetes",
+            "HIPERTENSION": "Hipertensión",
+            "OBESIDAD": "Obesidad",
+            "RENAL_CRONICA": "Enfermedad Renal",
+            "CARDIOVASCULAR": "Enfermedad Cardiovascular",
+            "EPOC": "EPOC",
+            "ASMA": "Asma",
+            "INMUSUPR": "Inmunosupresión",
+            "TABAQUISMO": "Tabaquismo",
+            "OTRA_COM": "Otras comorbilidades",
+        }
+
+        def agregar_comorbilidades_grupo():
+            # Conteos del grupo según la selección
+            if tipo_comparacion == "Casos Confirmados":
+                grupo = contar_casos([], COLUMNAS_COMORBILIDAD, CLASIFICACION_FINAL=1)
+            else:
+                grupo = contar_casos(
+                    [], COLUMNAS_COMORBILIDAD, CLASIFICACION_FINAL=1, DEFUNCION=True
+                )
+
+            # Calcular frecuencias (solo donde el valor es 1)
+            conteos = grupo.iloc[0]
+            frecuencias = {
+                nombres_legibles.get(col, col): int(conteos[col])
+                for col in columnas_comorb
+                if col in conteos.index
+            }
 
-ax.tick_params(axis="both", colors="white")
-ax.grid(axis="x", linestyle="--", alpha=0.3, color="gray")
+            # Calcular porcentajes sobre el total de pacientes
+            total_pacientes = int(conteos["CASOS"])
+            porcentajes = {
+                k: (v / total_pacientes) * 100 if total_pacientes > 0 else 0
+                for k, v in frecuencias.items()
+            }
 
-for spine in ax.spines.values():
-    spine.set_edgecolor("gray")
-    spine.set_linewidth(0.5)
+            # Convertir a DataFrame y ordenar
+            df_comorb_plot = pd.DataFrame({"Pacientes": frecuencias, "Porcentaje": porcentajes})
+            return df_comorb_plot.sort_values(by="Pacientes", ascending=True)
+
+        # Mostrar gráfico
+        mostrar_figura(
+            tanda,
+            clave_figura(
+                "comorbilidades_grupo", table_name, clave, filtros, tipo_comparacion
+            ),
+            grafica_comorbilidades_grupo,
+            agregar_comorbilidades_grupo,
+            tipo_comparacion,
+        )
 
-plt.tight_layout()
-# Mostrar gráfico
-st.pyplot(fig)
 
-divisor_visual();
+    panel_comorbilidades_grupo(contar_casos, tablas_vista, clave, vista, tanda)
 
+    divisor_visual();
 
-# =================== DIVISOR VISUAL ===================
-st.markdown(
-    """
+    # =================== DIVISOR VISUAL ===================
+    st.markdown(
+        """
 <div style="background-color: #1e1e2f; border-radius: 10px; padding: 15px; margin-bottom: 20px;">
     <h3 style="color: #ffffff; margin-top: 0; text-align: center;">Distribución de Casos por Rango de Edad</h3>
 </div>
 """,
-    unsafe_allow_html=True,
-)
+        unsafe_allow_html=True,
+    )
 
-# Filtrar edades válidas
-df_edad = df[df["EDAD"].notna() & (df["EDAD"] >= 0)]
-
-# Definir rangos y etiquetas
-bins = list(range(0, 100, 5)) + [150]
-labels = [f"{i}-{i+4}" for i in range(0, 95, 5)] + ["95+"]
-
-# Agrupar por rangos
-df_edad["RANGO_EDAD"] = pd.cut(df_edad["EDAD"], bins=bins, labels=labels, right=False)
-
-# Contar frecuencias por rango
-conteo_rangos = df_edad["RANGO_EDAD"].value_counts().sort_index()
-
-plt.style.use("dark_background")
-fig, ax = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
-fig.patch.set_facecolor("#1e1e2f")
-gradient_colors = plt.cm.viridis(np.linspace(0, 0.8, len(conteo_rangos)))
-bars = ax.bar(
-    range(len(conteo_rangos)),
-    conteo_rangos.values,
-    color=gradient_colors,
-    edgecolor="white",
-    linewidth=0.5,
-    alpha=0.8,
-)
+    # Definir rangos y etiquetas
+    bins = list(range(0, 100, 5)) + [150]
+    labels = [f"{i}-{i+4}" for i in range(0, 95, 5)] + ["95+"]
 
-ax.set_facecolor("#1e1e2f")
-ax.set_title(
-    "Distribución de Casos por Rango de Edad", fontsize=16, pad=20, color="white"
-)
-ax.set_xlabel("Rango de Edad", fontsize=12, color="white", labelpad=10)
-ax.set_ylabel("Número de Casos", fontsize=12, color="white", labelpad=10)
-ax.set_xticks(range(len(conteo_rangos)))
-ax.set_xticklabels(labels, rotation=45, ha="right", color="white", fontsize=10)
-ax.tick_params(axis="y", colors="white", labelsize=10)
-ax.grid(axis="y", linestyle="--", alpha=0.3, color="gray")
-umbral = (
-    max(conteo_rangos) * 0.05
-)  # Solo mostrar valores para barras con > 5% del máximo
-
-for i, v in enumerate(conteo_rangos.values):
-    if v > umbral:
-        ax.text(
-            i,
-            v + (max(conteo_rangos) * 0.01),
-            f"{int(v):,}",
-            ha="center",
-            va="bottom",
-            color="white",
-            fontsize=9,
-            rotation=0,
-            bbox=dict(boxstyle="round,pad=0.3", fc="#222244", alpha=0.7, ec="gray"),
-        )
-for spine in ax.spines.values():
-    spine.set_edgecolor("gray")
-    spine.set_linewidth(0.5)
-
-plt.tight_layout()
-st.pyplot(fig)
-
-
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    # Encontrar el rango de edad con más casos
-    rango_max = conteo_rangos.idxmax()
-    max_casos = conteo_rangos.max()
-    st.metric("Rango de edad más frecuente", f"{rango_max}", f"{max_casos:,} casos")
-
-with col2:
-    # Calcular edad promedio
-    rangos_dict = {}
-    for i, label in enumerate(labels):
-        if "-" in label:
-            inicio = int(label.split("-")[0])
-            fin = int(label.split("-")[1])
-            rangos_dict[label] = (inicio + fin) / 2
-        else:  # Para "95+"
-            rangos_dict[label] = 97.5
-
-    # Calcular promedio ponderado
-    total_casos = conteo_rangos.sum()
-    suma_ponderada = sum(
-        rangos_dict[rango] * casos for rango, casos in conteo_rangos.items()
+    # Casos por grupo de edad sumados en cada rango (solo edades válidas)
+    conteo_rangos = pd.Series(
+        histograma_edad(contar_casos(["GRUPO_EDAD"]), bins), index=labels
     )
-    edad_promedio = suma_ponderada / total_casos if total_casos > 0 else 0
 
-    st.metric(
-        "Edad promedio estimada",
-        f"{edad_promedio:.1f} años",
-        help="Calculado usando el punto medio de cada rango de edad",
+    mostrar_figura(
+        tanda,
+        clave_figura("rango_edad", tablas_vista, clave, vista),
+        grafica_rango_edad,
+        lambda: conteo_rangos,
     )
 
-with col3:
-    # Calcular mediana
-    casos_acumulados = 0
-    mediana_rango = labels[0]
-    mitad = total_casos / 2
-
-    for rango, casos in conteo_rangos.items():
-        casos_acumulados += casos
-        if casos_acumulados >= mitad:
-            mediana_rango = rango
-            break
-
-    st.metric(
-        "Rango de edad mediano",
-        f"{mediana_rango}",
-        help="Rango donde se alcanza el 50% acumulado de casos",
-    )
-    
-divisor_visual();
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        # Encontrar el rango de edad con más casos
+        rango_max = conteo_rangos.idxmax()
+        max_casos = conteo_rangos.max()
+        st.metric("Rango de edad más frecuente", f"{rango_max}", f"{max_casos:,} casos")
+
+    with col2:
+        # Calcular edad promedio
+        rangos_dict = {}
+        for i, label in enumerate(labels):
+            if "-" in label:
+                inicio = int(label.split("-")[0])
+                fin = int(label.split("-")[1])
+                rangos_dict[label] = (inicio + fin) / 2
+            else:  # Para "95+"
+                rangos_dict[label] = 97.5
+
+        # Calcular promedio ponderado
+        total_casos = conteo_rangos.sum()
+        suma_ponderada = sum(
+            rangos_dict[rango] * casos for rango, casos in conteo_rangos.items()
+        )
+        edad_promedio = suma_ponderada / total_casos if total_casos > 0 else 0
+
+        st.metric(
+            "Edad promedio estimada",
+            f"{edad_promedio:.1f} años",
+            help="Calculado usando el punto medio de cada rango de edad",
+        )
+
+    with col3:
+        # Calcular mediana
+        casos_acumulados = 0
+        mediana_rango = labels[0]
+        mitad = total_casos / 2
+
+        for rango, casos in conteo_rangos.items():
+            casos_acumulados += casos
+            if casos_acumulados >= mitad:
+                mediana_rango = rango
+                break
+
+        st.metric(
+            "Rango de edad mediano",
+            f"{mediana_rango}",
+            help="Rango donde se alcanza el 50% acumulado de casos",
+        )
+
+    divisor_visual();
 
 
-st.markdown(
-    """
+    st.markdown(
+        """
 <div style="background-color: #1e1e2f; border-radius: 10px; padding: 15px; margin-bottom: 20px;">
     <h3 style="color: #ffffff; margin-top: 0; text-align: center;">Distribución de Comorbilidades en Pacientes Fallecidos</h3>
 </div>
 """,
-    unsafe_allow_html=True,
-)
-
-# Filtrar defunciones válidas
-df_def = df[df["FECHA_DEF"].notna() & (df["FECHA_DEF"] != "9999-99-99")].copy()
-
-# Comorbilidades a considerar
-cols_comorb = [
-    "DIABETES",
-    "HIPERTENSION",
-    "OBESIDAD",
-    "RENAL_CRONICA",
-    "CARDIOVASCULAR",
-    "EPOC",
-    "ASMA",
-    "INMUSUPR",
-    "TABAQUISMO",
-    "OTRA_COM",
-]
-
-# Diccionario para nombres más legibles
-nombres_legibles = {
-    "DIABETES": "Diabetes",
-    "HIPERTENSION": "Hipertensión",
-    "OBESIDAD": "Obesidad",
-    "RENAL_CRONICA": "Enfermedad Renal",
-    "CARDIOVASCULAR": "Enfermedad Cardiovascular",
-    "EPOC": "EPOC",
-    "ASMA": "Asma",
-    "INMUSUPR": "Inmunosupresión",
-    "TABAQUISMO": "Tabaquismo",
-    "OTRA_COM": "Otras comorbilidades",
-}
-
-# Contar cuántos fallecidos tienen cada comorbilidad (valor = 1)
-conteo_comorb = {
-    nombres_legibles.get(col, col): df_def[df_def[col] == 1].shape[0]
-    for col in cols_comorb
-    if col in df_def.columns
-}
-
-# Quitar comorbilidades con 0 ocurrencias y ordenar por frecuencia descendente
-conteo_comorb = dict(
-    sorted(
-        {k: v for k, v in conteo_comorb.items() if v > 0}.items(),
-        key=lambda item: item[1],
-        reverse=True,
+        unsafe_allow_html=True,
     )
-)
 
-# Total de pacientes fallecidos
-total_fallecidos = len(df_def)
+    # Comorbilidades a considerar
+    cols_comorb = [
+        "DIABETES",
+        "HIPERTENSION",
+        "OBESIDAD",
+        "RENAL_CRONICA",
+        "CARDIOVASCULAR",
+        "EPOC",
+        "ASMA",
+        "INMUSUPR",
+        "TABAQUISMO",
+        "OTRA_COM",
+    ]
 
-# Total de comorbilidades (suma de todas las apariciones)
-total_comorbilidades = sum(conteo_comorb.values())
+    # Diccionario para nombres más legibles
+    nombres_legibles = {
+        "DIABETES": "Diabetes",
+        "HIPERTENSION": "Hipertensión",
+        "OBESIDAD": "Obesidad",
+        "RENAL_CRONICA": "Enfermedad Renal",
+        "CARDIOVASCULAR": "Enfermedad Cardiovascular",
+        "EPOC": "EPOC",
+        "ASMA": "Asma",
+        "INMUSUPR": "Inmunosupresión",
+        "TABAQUISMO": "Tabaquismo",
+        "OTRA_COM": "Otras comorbilidades",
+    }
 
-# Calcular porcentajes sobre el total de fallecidos
-porcentajes_sobre_fallecidos = {
-    k: (v / total_fallecidos) * 100 for k, v in conteo_comorb.items()
-}
+    def agregar_comorbilidades_fallecidos():
+        # Contar cuántos fallecidos tienen cada comorbilidad (valor = 1)
+        conteos = contar_casos([], COLUMNAS_COMORBILIDAD, DEFUNCION=True).iloc[0]
+        conteo_comorb = {
+            nombres_legibles.get(col, col): int(conteos[col])
+            for col in cols_comorb
+            if col in conteos.index
+        }
+
+        # Quitar comorbilidades con 0 ocurrencias y ordenar por frecuencia descendente
+        conteo_comorb = dict(
+            sorted(
+                {k: v for k, v in conteo_comorb.items() if v > 0}.items(),
+                key=lambda item: item[1],
+                reverse=True,
+            )
+        )
 
-colors = [
-    "#e74c3c",
-    "#3498db",
-    "#2ecc71",
-    "#f39c12",
-    "#9b59b6",
-    "#1abc9c",
-    "#e67e22",
-    "#34495e",
-    "#7f8c8d",
-    "#d35400",
-]
-
-plt.style.use("dark_background")
-fig, ax = plt.subplots(figsize=(10, 8), facecolor="#1e1e2f")
-fig.patch.set_facecolor("#1e1e2f")
-wedges, texts, autotexts = ax.pie(
-    conteo_comorb.values(),
-    labels=None,
-    autopct="%1.1f%%",
-    startangle=90,
-    wedgeprops=dict(
-        width=0.5, edgecolor="white", linewidth=0.5
-    ),
-    pctdistance=0.85,
-    colors=colors[: len(conteo_comorb)],
-)
+        # Total de pacientes fallecidos
+        total_fallecidos = int(conteos["CASOS"])
 
-for autotext in autotexts:
-    autotext.set_color("white")
-    autotext.set_fontsize(7)
-    autotext.set_weight("bold")
-centre_circle = plt.Circle((0, 0), 0.35, fc="#1e1e2f")
-ax.add_patch(centre_circle)
-ax.annotate(
-    f"{total_fallecidos:,}\nFallecidos",
-    xy=(0, 0),
-    ha="center",
-    va="center",
-    fontsize=14,
-    fontweight="bold",
-    color="white",
-)
+        # Total de comorbilidades (suma de todas las apariciones)
+        total_comorbilidades = sum(conteo_comorb.values())
+        return conteo_comorb, total_fallecidos, total_comorbilidades
 
-ax.legend(
-    wedges,
-    [f"{k} ({int(v):,})" for k, v in conteo_comorb.items()],
-    title="Comorbilidades",
-    loc="center left",
-    bbox_to_anchor=(1, 0, 0.5, 1),
-    frameon=True,
-    facecolor="#222244",
-    edgecolor="gray",
-    fontsize=10,
-)
-ax.set_title(
-    "Comorbilidades en Pacientes Fallecidos", fontsize=16, pad=20, color="white"
-)
-ax.axis("equal")
-fig.text(
-    0.5,
-    0.02,
-    f"* Los porcentajes representan la proporción de cada comorbilidad sobre el total de {total_comorbilidades:,} comorbilidades registradas",
-    ha="center",
-    color="white",
-    fontsize=9,
-    alpha=0.7,
-)
 
-st.pyplot(fig)
+    mostrar_figura(
+        tanda,
+        clave_figura("comorbilidades_fallecidos", tablas_vista, clave, vista),
+        grafica_comorbilidades_fallecidos,
+        agregar_comorbilidades_fallecidos,
+    )
 
-divisor_visual();
+    divisor_visual();
 
-col1, col2 = st.columns(2)
-with col1:
-    st.markdown(
-        """
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(
+            """
         <div style="background-color: #1e1e2f; border-radius: 10px; padding: 15px; margin-bottom: 20px;">
             <h3 style="color: #ffffff; margin-top: 0; text-align: center;">Distribución de Intubación por Rangos de Edad</h3>
         </div>
         """,
-        unsafe_allow_html=True,
-    )
-
-    # Filtrar solo valores válidos y con fecha
-    df_intubado_edad = df[df["INTUBADO"].isin([1, 2]) & df["EDAD"].notna()].copy()
-
-    # Crear rangos de edad
-    # Crear bins y etiquetas correctamente (10-intervalos)
-    bins = list(range(0, 101, 10)) + [
-        120
-    ]  # [0,10,20,...,100,120] → 12 valores → 11 intervalos
-    labels_rangos = [f"{i}-{i+9}" for i in range(0, 100, 10)] + [
-        "100+"
-    ]  # solo 11 etiquetas
-
-    df_intubado_edad["RANGO_EDAD"] = pd.cut(
-        df_intubado_edad["EDAD"], bins=bins, labels=labels_rangos, right=False
-    )
-    df_intubado_edad["ESTADO_INTUBADO"] = df_intubado_edad["INTUBADO"].map(
-        {1: "Sí", 2: "No"}
-    )
-
-    # Agrupar por rango e intubación
-    conteo_edad = (
-        df_intubado_edad.groupby(["RANGO_EDAD", "ESTADO_INTUBADO"])
-        .size()
-        .reset_index(name="PACIENTES")
-    )
+            unsafe_allow_html=True,
+        )
 
-    plt.style.use("dark_background")
-    fig1, ax1 = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
-    fig1.patch.set_facecolor("#1e1e2f")
-    color_intubado_si = "#e74c3c"  # Rojo para intubados
-    color_intubado_no = "#2ecc71"  # Verde para no intubados
-    bars = sns.barplot(
-        data=conteo_edad,
-        x="RANGO_EDAD",
-        y="PACIENTES",
-        hue="ESTADO_INTUBADO",
-        palette={"Sí": color_intubado_si, "No": color_intubado_no},
-        alpha=0.8,
-        ax=ax1,
-    )
-    ax1.set_facecolor("#1e1e2f")
-    ax1.set_title(
-        "Pacientes Intubados por Rango de Edad", fontsize=16, pad=20, color="white"
-    )
-    ax1.set_xlabel("Rango de Edad", fontsize=12, color="white")
-    ax1.set_ylabel("Número de Pacientes", fontsize=12, color="white")
-    plt.xticks(rotation=45, ha="right", color="white")
-    plt.yticks(color="white")
-    ax1.grid(axis="y", linestyle="--", alpha=0.3, color="gray")
-    legend = ax1.legend(
-        title="Estado de Intubación", frameon=True, facecolor="#222244", edgecolor="gray"
-    )
-    legend.get_title().set_color("white")
-    for text in legend.get_texts():
-        text.set_color("white")
-    for bar in ax1.patches:
-        bar.set_edgecolor("white")
-        bar.set_linewidth(0.5)
-    for spine in ax1.spines.values():
-        spine.set_edgecolor("gray")
-        spine.set_linewidth(0.5)
-    for bar in ax1.patches:
-        height = bar.get_height()
-        if height > 0:
-            if (
-                height > max(conteo_edad["PACIENTES"]) * 0.05
-            ):
-                ax1.text(
-                    bar.get_x() + bar.get_width() / 2.0,
-                    bar.get_height() + 5,
-                    f"{int(height):,}",
-                    ha="center",
-                    va="bottom",
-                    color="white",
-                    fontsize=8,
-                    bbox=dict(boxstyle="round,pad=0.2", fc="#222244", alpha=0.7, ec="gray"),
-                )
-    plt.tight_layout()
-    st.pyplot(fig1)
-# =================== DIVISOR VISUAL ===================
-divisor_visual();
+        # Crear rangos de edad
+        # Crear bins y etiquetas correctamente (10-intervalos)
+        bins = list(range(0, 101, 10)) + [
+            120
+        ]  # [0,10,20,...,100,120] → 12 valores → 11 intervalos
+        labels_rangos = [f"{i}-{i+9}" for i in range(0, 100, 10)] + [
+            "100+"
+        ]  # solo 11 etiquetas
+
+        # Agrupar por rango e intubación (solo valores válidos)
+        mostrar_figura(
+            tanda,
+            clave_figura("intubacion_edad", tablas_vista, clave, vista),
+            grafica_intubacion_edad,
+            lambda: contar_por_rango_edad(
+                contar_casos(["GRUPO_EDAD", "INTUBADO"], INTUBADO=[1, 2]),
+                "INTUBADO",
+                {1: "Sí", 2: "No"},
+                bins,
+                labels_rangos,
+                "ESTADO_INTUBADO",
+                "PACIENTES",
+            ),
+        )
+    # =================== DIVISOR VISUAL ===================
+    divisor_visual();
 
-# === Gráfico: Días entre inicio de síntomas e ingreso (0–20 días, en pasos de 2) ===
-with col2:
-    st.markdown(
-        """
+    # === Gráfico: Días entre inicio de síntomas e ingreso (0–20 días, en pasos de 2) ===
+    with col2:
+        st.markdown(
+            """
     <div style="background-color: #1e1e2f; border-radius: 10px; padding: 15px; margin-bottom: 20px;">
         <h3 style="color: #ffffff; margin-top: 0; text-align: center;">Días desde Inicio de Síntomas hasta Ingreso Hospitalario</h3>
     </div>
     """,
-        unsafe_allow_html=True,
-    )
+            unsafe_allow_html=True,
+        )
 
-    # Asegurar fechas válidas
-    df_fechas = df.copy()
-    df_fechas["FECHA_SINTOMAS"] = pd.to_datetime(
-        df_fechas["FECHA_SINTOMAS"], errors="coerce"
-    )
-    df_fechas["FECHA_INGRESO"] = pd.to_datetime(df_fechas["FECHA_INGRESO"], errors="coerce")
+        def agregar_sintomas_ingreso():
+            # Casos por diferencia de días (NaN si falta alguna fecha)
+            conteo_dias = contar_casos(["DIAS_SINTOMAS_INGRESO"])
+            diferencia_dias = conteo_dias["DIAS_SINTOMAS_INGRESO"]
+
+            # Filtrar días entre 0 y 20
+            en_rango = (diferencia_dias >= 0) & (diferencia_dias <= 20)
+
+            # Bins de 2 en 2
+            bins = list(range(0, 22, 2))  # 0–2, 2–4, ..., 20
+            return np.histogram(
+                diferencia_dias[en_rango],
+                bins=bins,
+                weights=conteo_dias["CASOS"][en_rango],
+            )
+
+        mostrar_figura(
+            tanda,
+            clave_figura("sintomas_ingreso", tablas_vista, clave, vista),
+            grafica_sintomas_ingreso,
+            agregar_sintomas_ingreso,
+        )
 
-    # Calcular diferencia de días
-    df_fechas = df_fechas[
-        df_fechas["FECHA_SINTOMAS"].notna() & df_fechas["FECHA_INGRESO"].notna()
-    ]
-    df_fechas["DIFERENCIA_DIAS"] = (
-        df_fechas["FECHA_INGRESO"] - df_fechas["FECHA_SINTOMAS"]
-    ).dt.days
 
-    # Filtrar días entre 0 y 20
-    df_dias = df_fechas[
-        (df_fechas["DIFERENCIA_DIAS"] >= 0) & (df_fechas["DIFERENCIA_DIAS"] <= 20)
+
+    st.markdown("## Influencia de Comorbilidades en la Intubación")
+    # Pacientes con INTUBADO válido y, de ellos, los intubados
+    intubacion = contar_casos(["INTUBADO"], COLUMNAS_COMORBILIDAD, INTUBADO=[1, 2])
+    medidas_intubacion = [
+        col for col in COLUMNAS_COMORBILIDAD if col in intubacion.columns
+    ]
+    conteos_validos = intubacion[medidas_intubacion].sum()
+    conteos_intubados = intubacion.loc[
+        intubacion["INTUBADO"] == 1, medidas_intubacion
+    ].sum()
+
+    # Comorbilidades a evaluar
+    comorbilidades = [
+        "DIABETES",
+        "HIPERTENSION",
+        "OBESIDAD",
+        "RENAL_CRONICA",
+        "CARDIOVASCULAR",
+        "EPOC",
+        "ASMA",
+        "INMUSUPR",
+        "TABAQUISMO",
+        "OTRA_COM",
     ]
 
-    # Bins de 2 en 2
-    bins = list(range(0, 22, 2))  # 0–2, 2–4, ..., 20
-    labels = [f"{i}-{i+1}" for i in range(0, 20, 2)]
-
-    plt.style.use("dark_background")
-    fig, ax = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
-    fig.patch.set_facecolor("#1e1e2f")
-
-    color_base = "#3498db"  # Azul para el histograma
-    counts, edges, bars = ax.hist(
-        df_dias["DIFERENCIA_DIAS"],
-        bins=bins,
-        edgecolor="white",
-        linewidth=0.8,
-        color=color_base,
-        alpha=0.8,
-    )
-    ax.set_facecolor("#1e1e2f")
-    ax.set_title(
-        "Distribución de Días con Síntomas antes del Ingreso Hospitalario",
-        fontsize=16,
-        pad=20,
-        color="white",
-    )
-    ax.set_xlabel(
-        "Días desde inicio de síntomas hasta ingreso",
-        fontsize=12,
-        color="white",
-        labelpad=10,
-    )
-    ax.set_ylabel("Número de Pacientes", fontsize=12, color="white", labelpad=10)
-
-    ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda x, pos: f"{int(x):,}"))
-
-    # Eje X con ticks pares y etiquetas mejoradas
-    ax.set_xticks(list(range(0, 21, 2)))  # 0, 2, 4, ..., 20
-    ax.tick_params(axis="both", colors="white", labelsize=10)
-    ax.grid(axis="y", linestyle="--", alpha=0.3, color="gray")
-
-    # Mostrar valores encima de las barras
-    for i, (count, bar) in enumerate(zip(counts, bars)):
-        height = bar.get_height()
-        if height > 0:
-            ax.annotate(
-                f"{int(count):,}",
-                xy=(bar.get_x() + bar.get_width() / 2, height),
-                xytext=(0, 5),
-                textcoords="offset points",
-                ha="center",
-                va="bottom",
-                fontsize=9,
-                color="white",
-                bbox=dict(boxstyle="round,pad=0.2", fc="#222244", alpha=0.7, ec="gray"),
+    # Construcción de tabla
+    data = []
+    for col in comorbilidades:
+        if col in conteos_validos.index:
+            n_total = int(conteos_validos[col])
+            n_intub = int(conteos_intubados[col])
+            pct = round((n_intub / n_total) * 100, 1) if n_total > 0 else 0
+            data.append(
+                {
+                    "Comorbilidad": col,
+                    "Total con comorbilidad": n_total,
+                    "Intubados": n_intub,
+                    "% Intubados": pct,
+                }
             )
 
-    for spine in ax.spines.values():
-        spine.set_edgecolor("gray")
-        spine.set_linewidth(0.5)
-
-    plt.tight_layout()
-
-    st.pyplot(fig)
-
-
-
-st.markdown("## Influencia de Comorbilidades en la Intubación")
-# Filtrar pacientes con INTUBADO válido
-df_intub = df[df["INTUBADO"].isin([1, 2])].copy()
-
-# Comorbilidades a evaluar
-comorbilidades = [
-    "DIABETES",
-    "HIPERTENSION",
-    "OBESIDAD",
-    "RENAL_CRONICA",
-    "CARDIOVASCULAR",
-    "EPOC",
-    "ASMA",
-    "INMUSUPR",
-    "TABAQUISMO",
-    "OTRA_COM",
-]
-
-# Construcción de tabla
-data = []
-for col in comorbilidades:
-    if col in df_intub.columns:
-        total = df_intub[df_intub[col] == 1]
-        n_total = len(total)
-        n_intub = len(total[total["INTUBADO"] == 1])
-        pct = round((n_intub / n_total) * 100, 1) if n_total > 0 else 0
-        data.append(
-            {
-                "Comorbilidad": col,
-                "Total con comorbilidad": n_total,
-                "Intubados": n_intub,
-                "% Intubados": pct,
-            }
-        )
+    # Crear DataFrame y ordenar por % Intubados DESC
+    df_result = pd.DataFrame(data).sort_values(by="% Intubados", ascending=False)
+    df_result = df_result.reset_index(drop=True)
 
-# Crear DataFrame y ordenar por % Intubados DESC
-df_result = pd.DataFrame(data).sort_values(by="% Intubados", ascending=False)
-df_result = df_result.reset_index(drop=True)
+    # En lugar de usar .style.format(), formatee los valores directamente en el DataFrame
+    df_result["Total con comorbilidad"] = df_result["Total con comorbilidad"].apply(
+        lambda x: f"{x:,}"
+    )
+    df_result["Intubados"] = df_result["Intubados"].apply(lambda x: f"{x:,}")
+    df_result["% Intubados"] = df_result["% Intubados"].apply(lambda x: f"{x:.1f} %")
+
+    # Mostrar con st.table() que aplica un estilo predefinido
+    st.table(df_result)
+
+    # Esperar y colocar las figuras encargadas al pool
+    completar_tanda(tanda)
 
-# En lugar de usar .style.format(), formatee los valores directamente en el DataFrame
-df_result["Total con comorbilidad"] = df_result["Total con comorbilidad"].apply(
-    lambda x: f"{x:,}"
-)
-df_result["Intubados"] = df_result["Intubados"].apply(lambda x: f"{x:,}")
-df_result["% Intubados"] = df_result["% Intubados"].apply(lambda x: f"{x:.1f} %")
 
-# Mostrar con st.table() que aplica un estilo predefinido
-st.table(df_result)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,565 @@
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pymysql
+import streamlit as st
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # Sin pyarrow no hay snapshots: se carga siempre desde MySQL
+    pa = None
+
+# Directorio de snapshots columnares (Arrow IPC), uno por tabla
+SNAPSHOT_DIR = os.environ.get(
+    "COVID19_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots"),
+)
+# Se incrementa cuando cambia el esquema con el que se guardan los datos
+FORMATO_SNAPSHOT = 2
+
+# Origen de los agregados del dashboard: "memoria" descarga la tabla y agrega
+# en el proceso; "mysql" resuelve cada agregado con GROUP BY (pushdown.py)
+MODO_DATOS = os.environ.get("COVID19_MODO_DATOS", "memoria")
+
+# Política de invalidación del cache de datos
+TTL_DATOS = 6 * 60 * 60  # Vida máxima de una tabla en memoria (segundos)
+INTERVALO_VERIFICACION = 5 * 60  # Cada cuánto se revisa si la tabla origen cambió
+MAX_TABLAS_CACHE = 5  # Los cuatro años más una versión en reemplazo
+
+# Pool de conexiones a MySQL
+TAMANO_POOL_MYSQL = int(os.environ.get("COVID19_POOL_MYSQL", 4))
+ESPERA_CONEXION = 30  # Espera máxima por una conexión libre (segundos)
+VIDA_MAXIMA_CONEXION = 30 * 60  # Pasado este tiempo la conexión se reemplaza
+INACTIVIDAD_VERIFICACION = 60  # Inactiva más tiempo: se verifica con ping
+
+# Precarga en segundo plano de los años no seleccionados ("0" la desactiva).
+# Usa a lo sumo la mitad del pool para dejar conexiones a las sesiones.
+PRECARGA_ANIOS = os.environ.get("COVID19_PRECARGA", "1") != "0"
+WORKERS_PRECARGA = max(1, TAMANO_POOL_MYSQL // 2)
+
+
+# --- Conexión a MySQL ---
+def get_mysql_connection():
+    return pymysql.connect(
+        host="localhost",
+        user="root",
+        password="Wizardkiller#02",
+        database="covid19",
+        cursorclass=pymysql.cursors.Cursor,
+    )
+
+
+# --- Pool de conexiones ---
+# Conexiones abiertas y reutilizadas por todo el proceso, compartidas entre
+# sesiones. Como mucho hay TAMANO_POOL_MYSQL en uso a la vez; quien pide una
+# de más espera hasta ESPERA_CONEXION segundos. Al tomar una conexión libre
+# se descarta si superó VIDA_MAXIMA_CONEXION y, si estuvo inactiva, se
+# verifica con ping (reconecta si MySQL la cerró).
+@st.cache_resource(show_spinner=False)
+def pool_mysql():
+    return {
+        "libres": [],  # (conexión, creada, última vez devuelta)
+        "lock": threading.Lock(),
+        "cupos": threading.BoundedSemaphore(TAMANO_POOL_MYSQL),
+    }
+
+
+def cerrar_conexion(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def conexion_libre(pool):
+    ahora = time.monotonic()
+    while True:
+        with pool["lock"]:
+            if not pool["libres"]:
+                return None
+            connection, creada, devuelta = pool["libres"].pop()
+        if ahora - creada > VIDA_MAXIMA_CONEXION:
+            cerrar_conexion(connection)
+            continue
+        if ahora - devuelta > INACTIVIDAD_VERIFICACION:
+            try:
+                connection.ping(reconnect=True)
+            except pymysql.MySQLError:
+                cerrar_conexion(connection)
+                continue
+        return connection, creada
+
+
+# Pool sin conexiones libres tras ESPERA_CONEXION: MySQL responde pero está
+# ocupado. No es un pymysql.MySQLError para que no se tome por MySQL caído
+# (ver marcador_fuente) ni quede en cache.
+class PoolAgotado(Exception):
+    pass
+
+
+def tomar_conexion(pool):
+    if not pool["cupos"].acquire(timeout=ESPERA_CONEXION):
+        raise PoolAgotado("No hay conexiones a MySQL libres en el pool")
+    try:
+        libre = conexion_libre(pool)
+        if libre is not None:
+            return libre
+        return get_mysql_connection(), time.monotonic()
+    except BaseException:
+        pool["cupos"].release()
+        raise
+
+
+# Una conexión con error de conexión se cierra en lugar de volver al pool; el
+# rollback al devolverla descarta también las que quedaron en mal estado
+def devolver_conexion(pool, connection, creada, reutilizable=True):
+    try:
+        if reutilizable and connection.open:
+            # Termina la transacción de lectura para que el siguiente uso
+            # vea los datos vigentes
+            connection.rollback()
+            with pool["lock"]:
+                pool["libres"].append((connection, creada, time.monotonic()))
+            return
+    except pymysql.MySQLError:
+        pass
+    finally:
+        pool["cupos"].release()
+    cerrar_conexion(connection)
+
+
+@contextmanager
+def conexion_mysql():
+    pool = pool_mysql()
+    connection, creada = tomar_conexion(pool)
+    reutilizable = True
+    try:
+        yield connection
+    except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+        reutilizable = False
+        raise
+    finally:
+        devolver_conexion(pool, connection, creada, reutilizable)
+
+
+# --- Marcador de cambios de la tabla origen ---
+# Los datos en cache y el snapshot solo son válidos mientras el número de
+# filas y la última FECHA_ACTUALIZACION de la tabla sigan siendo los mismos.
+# Si la tabla no tiene FECHA_ACTUALIZACION se usa el UPDATE_TIME de MySQL.
+def leer_marcador(connection, table_name):
+    with connection.cursor() as cursor:
+        if "FECHA_ACTUALIZACION" in columnas_tabla(connection, table_name):
+            cursor.execute(
+                f"SELECT COUNT(*), MAX(FECHA_ACTUALIZACION) FROM {table_name}"
+            )
+            filas, actualizacion = cursor.fetchone()
+        else:
+            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+            filas = cursor.fetchone()[0]
+            cursor.execute(
+                "SELECT UPDATE_TIME FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                (table_name,),
+            )
+            fila = cursor.fetchone()
+            actualizacion = fila[0] if fila else None
+    return {
+        "filas": int(filas),
+        "actualizacion": str(actualizacion) if actualizacion is not None else None,
+    }
+
+
+# --- Snapshots en disco ---
+def rutas_snapshot(table_name):
+    base = os.path.join(SNAPSHOT_DIR, table_name)
+    return base + ".arrow", base + ".json"
+
+
+# Devuelve el snapshot de la tabla, o None si no existe, no coincide con el
+# marcador o no contiene todas las columnas pedidas. Con marcador=None se
+# sirve sin validar (MySQL no disponible).
+def cargar_snapshot(table_name, marcador=None, columnas=None):
+    if pa is None:
+        return None
+    ruta_datos, ruta_meta = rutas_snapshot(table_name)
+    if not (os.path.exists(ruta_datos) and os.path.exists(ruta_meta)):
+        return None
+    with open(ruta_meta, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("formato") != FORMATO_SNAPSHOT:
+        return None
+    if marcador is not None and meta.get("marcador") != marcador:
+        return None
+    # El archivo IPC sin compresión se mapea en memoria: no se copia a un
+    # buffer intermedio antes de construir el DataFrame.
+    with pa.memory_map(ruta_datos, "r") as fuente:
+        tabla = ipc.open_file(fuente).read_all()
+    if columnas is not None:
+        if not set(columnas) <= set(tabla.column_names):
+            return None
+        tabla = tabla.select(list(columnas))
+    return tabla.to_pandas(split_blocks=True)
+
+
+def guardar_snapshot(table_name, df, marcador):
+    if pa is None or marcador is None:
+        return
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    ruta_datos, ruta_meta = rutas_snapshot(table_name)
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Escritura atómica: primero los datos y después el marcador, para que
+    # otro proceso nunca vea un marcador nuevo junto a datos viejos.
+    tmp_datos = ruta_datos + f".{os.getpid()}.tmp"
+    with pa.OSFile(tmp_datos, "wb") as destino:
+        with ipc.new_file(destino, tabla.schema) as writer:
+            writer.write_table(tabla)
+    os.replace(tmp_datos, ruta_datos)
+
+    tmp_meta = ruta_meta + f".{os.getpid()}.tmp"
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(
+            {"tabla": table_name, "formato": FORMATO_SNAPSHOT, "marcador": marcador}, f
+        )
+    os.replace(tmp_meta, ruta_meta)
+
+
+# --- Decodificación tipada por lotes ---
+COLUMNAS_COMORBILIDAD = [
+    "DIABETES",
+    "HIPERTENSION",
+    "OBESIDAD",
+    "RENAL_CRONICA",
+    "CARDIOVASCULAR",
+    "EPOC",
+    "ASMA",
+    "INMUSUPR",
+    "TABAQUISMO",
+    "OTRA_COM",
+]
+
+COLUMNAS_FECHA = ["FECHA_INGRESO", "FECHA_SINTOMAS", "FECHA_DEF"]
+
+# Tipo compacto de cada columna conocida; el resto se conserva como object
+TIPOS_COLUMNAS = {
+    "SEXO": np.int8,
+    "TIPO_PACIENTE": np.int8,
+    "INTUBADO": np.int8,
+    "CLASIFICACION_FINAL": np.int8,
+    **{col: np.int8 for col in COLUMNAS_COMORBILIDAD},
+    "EDAD": np.int16,
+    **{col: np.dtype("datetime64[ns]") for col in COLUMNAS_FECHA},
+}
+
+TAMANO_LOTE = 50_000
+SIN_DATO = -1  # Valor para NULL en columnas enteras
+
+
+def decodificar_columna(columna, valores):
+    tipo = TIPOS_COLUMNAS.get(columna)
+    if tipo is None:
+        return valores
+    if np.dtype(tipo).kind == "M":
+        # "9999-99-99" (sin defunción) y fechas inválidas quedan como NaT
+        return pd.to_datetime(
+            pd.Series(valores, dtype=object), errors="coerce", format="%Y-%m-%d"
+        ).to_numpy(dtype=tipo)
+    return np.fromiter(
+        (SIN_DATO if v is None else int(v) for v in valores),
+        dtype=tipo,
+        count=len(valores),
+    )
+
+
+def preasignar(columna, capacidad):
+    return np.empty(capacidad, dtype=TIPOS_COLUMNAS.get(columna, object))
+
+
+def columnas_tabla(connection, table_name):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT * FROM {table_name} LIMIT 0")
+        return [col[0] for col in cursor.description]
+
+
+# Lista SELECT con solo las columnas pedidas que existen en la tabla
+def proyeccion_sql(connection, table_name, columnas=None):
+    if columnas is None:
+        return "*"
+    existentes = set(columnas_tabla(connection, table_name))
+    return ", ".join(f"`{col}`" for col in columnas if col in existentes)
+
+
+# Lee la tabla con un cursor sin buffer (SSCursor) en lotes de fetchmany.
+# Cada lote se decodifica directamente en arreglos tipados preasignados, de
+# modo que nunca se materializa la lista completa de tuplas.
+def consultar_tabla(
+    connection, table_name, total_filas=0, columnas=None, tamano_lote=TAMANO_LOTE
+):
+    proyeccion = proyeccion_sql(connection, table_name, columnas)
+    with connection.cursor(pymysql.cursors.SSCursor) as cursor:
+        cursor.execute(f"SELECT {proyeccion} FROM {table_name}")
+        columnas = [col[0] for col in cursor.description]
+        capacidad = max(total_filas, 1)
+        arreglos = {col: preasignar(col, capacidad) for col in columnas}
+        n = 0
+        while True:
+            lote = cursor.fetchmany(tamano_lote)
+            if not lote:
+                break
+            fin = n + len(lote)
+            if fin > capacidad:
+                # La tabla creció desde el COUNT(*): se amplían los arreglos
+                capacidad = max(fin, capacidad * 2)
+                for col, arreglo in arreglos.items():
+                    nuevo = preasignar(col, capacidad)
+                    nuevo[:n] = arreglo[:n]
+                    arreglos[col] = nuevo
+            for col, valores in zip(columnas, zip(*lote)):
+                arreglos[col][n:fin] = decodificar_columna(col, valores)
+            n = fin
+    return pd.DataFrame({col: arreglos[col][:n] for col in columnas}, copy=False)
+
+
+# --- Normalización del esquema ---
+COLUMNAS_CATEGORIA = ["REGION", "ENTIDAD"]
+
+
+def normalizar_columna(serie, tipo):
+    if serie.dtype == tipo:
+        return serie
+    if np.dtype(tipo).kind == "M":
+        if serie.dtype.kind == "M":
+            return serie.astype(tipo)
+        return pd.to_datetime(serie, errors="coerce", format="%Y-%m-%d")
+    return pd.to_numeric(serie, errors="coerce").fillna(SIN_DATO).astype(tipo)
+
+
+# Deja el DataFrame con el esquema compacto: banderas en int8, EDAD en int16,
+# FECHA_* en datetime64 ("9999-99-99" → NaT) y REGION/ENTIDAD como category.
+# Es idempotente: las columnas que ya tienen su tipo no se tocan.
+def normalizar_esquema(df):
+    for col in df.columns:
+        if col in TIPOS_COLUMNAS:
+            df[col] = normalizar_columna(df[col], TIPOS_COLUMNAS[col])
+        elif col in COLUMNAS_CATEGORIA and not isinstance(
+            df[col].dtype, pd.CategoricalDtype
+        ):
+            df[col] = df[col].astype("category")
+    return df
+
+
+# Columnas derivadas, calculadas una sola vez por carga
+# Fechas: MES_INGRESO (1-12, SIN_DATO sin fecha) y DIAS_SINTOMAS_INGRESO (NaN
+# si falta alguna de las dos fechas).
+def derivar_columnas_fecha(df):
+    if "FECHA_INGRESO" in df.columns:
+        df["MES_INGRESO"] = (
+            df["FECHA_INGRESO"].dt.month.fillna(SIN_DATO).astype(np.int8)
+        )
+        if "FECHA_SINTOMAS" in df.columns:
+            df["DIAS_SINTOMAS_INGRESO"] = (
+                (df["FECHA_INGRESO"] - df["FECHA_SINTOMAS"]).dt.days.astype(np.float32)
+            )
+    return df
+
+
+# Edad: GRUPO_EDAD es el grupo quinquenal de cada fila en int8 (EDAD // 5;
+# 0 = 0-4 años, ..., GRUPOS_EDAD - 1 = 150 años o más) y SIN_DATO para edades
+# faltantes o negativas. Los rangos de edad de las gráficas son uniones de
+# estos grupos (ver rangos_edad en analytics.py).
+ANCHO_GRUPO_EDAD = 5
+GRUPOS_EDAD = 31
+
+
+def derivar_grupo_edad(df):
+    if "EDAD" in df.columns:
+        edad = df["EDAD"].to_numpy()
+        grupo = np.minimum(edad // ANCHO_GRUPO_EDAD, GRUPOS_EDAD - 1).astype(np.int8)
+        grupo[edad < 0] = SIN_DATO
+        df["GRUPO_EDAD"] = grupo
+    return df
+
+
+COLUMNAS_DERIVADAS = ("MES_INGRESO", "DIAS_SINTOMAS_INGRESO", "GRUPO_EDAD")
+
+
+def derivar_columnas(df):
+    return derivar_grupo_edad(derivar_columnas_fecha(df))
+
+
+# Bytes por fila que ocupaba la columna tal como la entrega pymysql:
+# enteros en int64 y textos/fechas como objetos str de Python.
+def bytes_por_fila_sin_normalizar(serie):
+    if len(serie) == 0:
+        return 0.0
+    puntero = np.dtype(object).itemsize
+    if serie.dtype.kind in "iu":
+        return float(np.dtype(np.int64).itemsize)
+    if serie.dtype.kind == "M":
+        return float(puntero + sys.getsizeof("9999-99-99"))
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos = serie.cat.codes.to_numpy()
+        conteos = np.bincount(codigos[codigos >= 0], minlength=len(serie.cat.categories))
+        tamanos = np.array([sys.getsizeof(str(c)) for c in serie.cat.categories])
+        return puntero + float(conteos @ tamanos) / len(serie)
+    return serie.memory_usage(deep=True, index=False) / len(serie)
+
+
+# Las columnas derivadas no llegaban de pymysql: no tienen "antes" y van
+# aparte del TOTAL, que compara solo las columnas de la tabla origen.
+def reporte_memoria(df):
+    n = max(len(df), 1)
+    derivadas = df.columns.isin(COLUMNAS_DERIVADAS)
+    reporte = pd.DataFrame(
+        {
+            "Tipo": [str(df[col].dtype) for col in df.columns],
+            "Bytes/fila antes": [
+                bytes_por_fila_sin_normalizar(df[col]) for col in df.columns
+            ],
+            "Bytes/fila después": [
+                df[col].memory_usage(deep=True, index=False) / n for col in df.columns
+            ],
+        },
+        index=df.columns,
+    )
+    reporte.loc[derivadas, "Bytes/fila antes"] = np.nan
+    despues = reporte["Bytes/fila después"]
+    reporte.loc["TOTAL"] = [
+        "",
+        reporte["Bytes/fila antes"].sum(),
+        despues[~derivadas].sum(),
+    ]
+    reporte.loc["TOTAL con derivadas"] = ["", np.nan, despues.sum()]
+    return reporte.round(1)
+
+
+# --- Invalidación del cache por tabla ---
+# Cada tabla tiene una generación; "Actualizar datos" la incrementa y con ello
+# cambia la clave de cache de esa tabla sin tocar las demás. También borra su
+# snapshot: el marcador no detecta UPDATEs que no cambian COUNT(*) si no hay
+# FECHA_ACTUALIZACION ni UPDATE_TIME, así que la recarga manual siempre vuelve
+# a descargar la tabla de MySQL (y reescribe el snapshot).
+generaciones = {}
+generaciones_lock = threading.Lock()
+
+
+def generacion_tabla(table_name):
+    with generaciones_lock:
+        return generaciones.get(table_name, 0)
+
+
+def borrar_snapshot(table_name):
+    # Primero el marcador, para que nadie vea un marcador sin sus datos
+    for ruta in reversed(rutas_snapshot(table_name)):
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+
+
+def invalidar_tabla(table_name):
+    borrar_snapshot(table_name)
+    with generaciones_lock:
+        generaciones[table_name] = generaciones.get(table_name, 0) + 1
+
+
+# Marcador de la tabla origen, revisado como mucho cada INTERVALO_VERIFICACION.
+# Devuelve None si MySQL no está disponible. PoolAgotado se propaga: con el
+# pool ocupado MySQL sigue disponible y no se sirve el snapshot sin validar.
+@st.cache_data(ttl=INTERVALO_VERIFICACION, show_spinner=False)
+def marcador_fuente(table_name, generacion=0):
+    try:
+        with conexion_mysql() as connection:
+            return leer_marcador(connection, table_name)
+    except pymysql.MySQLError:
+        return None
+
+
+# Clave con la que se identifica la versión vigente de una tabla
+def clave_tabla(table_name):
+    generacion = generacion_tabla(table_name)
+    return generacion, marcador_fuente(table_name, generacion)
+
+
+# --- Cache por año ---
+# Almacén compartido por todo el proceso: st.cache_resource devuelve el mismo
+# DataFrame a todas las sesiones sin copiarlo, así que es de solo lectura.
+# Quien necesite columnas derivadas debe trabajar sobre un subconjunto.
+# columnas: proyección a descargar (tupla); None descarga todas las columnas.
+# generacion y marcador (ver clave_tabla) solo forman parte de la clave: si la
+# tabla origen cambia o se invalida, la siguiente llamada vuelve a cargar.
+# Los errores se propagan para que una carga fallida no quede en cache.
+@st.cache_resource(
+    show_spinner="Cargando datos desde MySQL...",
+    ttl=TTL_DATOS,
+    max_entries=MAX_TABLAS_CACHE,
+)
+def load_table_cached(table_name, columnas=None, generacion=0, marcador=None):
+    if marcador is None:
+        # MySQL no disponible: se sirve el último snapshot sin validar
+        df = cargar_snapshot(table_name, columnas=columnas)
+        if df is None:
+            raise ConnectionError("MySQL no está disponible y no hay snapshot local")
+        st.warning(
+            f"No se pudo conectar a MySQL; se usa el último snapshot de {table_name}."
+        )
+        return derivar_columnas(normalizar_esquema(df))
+
+    df = cargar_snapshot(table_name, marcador, columnas)
+    if df is not None:
+        return derivar_columnas(normalizar_esquema(df))
+
+    with conexion_mysql() as connection:
+        df = normalizar_esquema(
+            consultar_tabla(connection, table_name, marcador["filas"], columnas)
+        )
+    try:
+        guardar_snapshot(table_name, df, marcador)
+    except Exception as e:
+        st.warning(f"No se pudo guardar el snapshot de {table_name}: {e}")
+    return derivar_columnas(df)
+
+
+# --- Carga concurrente y precarga ---
+# Hilos compartidos por todo el proceso que preparan tablas en segundo plano,
+# cada uno con su propia conexión del pool. Si una sesión pide una tabla que
+# se está precargando, st.cache_resource la hace esperar esa misma carga en
+# lugar de repetirla.
+@st.cache_resource(show_spinner=False)
+def pool_precarga():
+    return ThreadPoolExecutor(
+        max_workers=WORKERS_PRECARGA, thread_name_prefix="precarga"
+    )
+
+
+# Última precarga encargada por tabla: {table_name: (generación, hora, futuro)}
+precargas = {}
+precargas_lock = threading.Lock()
+
+
+# Ejecuta tarea(*args) en segundo plano para la tabla. No se vuelve a
+# encargar mientras siga en curso, ni hasta INTERVALO_VERIFICACION después
+# (la tarea revisa la versión de la tabla con clave_tabla), salvo que la
+# tabla se haya invalidado.
+def precargar(table_name, tarea, *args):
+    generacion = generacion_tabla(table_name)
+    ahora = time.monotonic()
+    with precargas_lock:
+        anterior = precargas.get(table_name)
+        if anterior is not None:
+            generacion_anterior, encargada, futuro = anterior
+            if generacion_anterior == generacion and (
+                not futuro.done() or ahora - encargada < INTERVALO_VERIFICACION
+            ):
+                return futuro
+        futuro = pool_precarga().submit(tarea, *args)
+        precargas[table_name] = (generacion, ahora, futuro)
+        return futuro
@@ -0,0 +1,185 @@
+import argparse
+import sys
+import time
+
+from data_loading import columnas_tabla, get_mysql_connection, leer_marcador
+from pushdown import (
+    FORMATO_RESUMENES,
+    RESUMENES,
+    TABLA_MARCAS,
+    columna_sql,
+    condiciones_sql,
+    consulta_conteos,
+    expresion_sql,
+    leer_marca,
+    nombre_resumen,
+)
+
+# --- ETL de tablas resumen ---
+# Mantiene las tablas resumen de pushdown.py junto a cada tabla origen:
+#
+#     python etl.py                  # todos los años, incremental
+#     python etl.py covid19_2023     # solo un año
+#     python etl.py --completo       # reconstruye desde cero
+#
+# La marca de agua es el marcador de la tabla origen (filas y última
+# FECHA_ACTUALIZACION, ver leer_marcador) guardado en etl_marcas. En cada
+# corrida solo se recalculan los meses de ingreso que tienen filas con
+# FECHA_ACTUALIZACION posterior a la marca; el resto del resumen no se toca.
+TABLAS = ["covid19_2020", "covid19_2021", "covid19_2022", "covid19_2023"]
+PARTICION = "MES_INGRESO"
+
+
+def crear_tabla_marcas(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {TABLA_MARCAS} ("
+            "tabla VARCHAR(64) PRIMARY KEY, "
+            "filas BIGINT, "
+            "actualizacion VARCHAR(32), "
+            "formato INT)"
+        )
+
+
+def guardar_marca(connection, table_name, marcador):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"REPLACE INTO {TABLA_MARCAS} (tabla, filas, actualizacion, formato) "
+            "VALUES (%s, %s, %s, %s)",
+            (
+                table_name,
+                marcador["filas"],
+                marcador["actualizacion"],
+                FORMATO_RESUMENES,
+            ),
+        )
+
+
+def borrar_marca(connection, table_name):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLA_MARCAS} WHERE tabla = %s", (table_name,))
+
+
+# Medidas del resumen que existen en la tabla origen
+def medidas_resumen(connection, table_name, nombre):
+    existentes = set(columnas_tabla(connection, table_name))
+    return [col for col in RESUMENES[nombre]["medidas"] if col in existentes]
+
+
+def reconstruir_resumenes(connection, table_name):
+    with connection.cursor() as cursor:
+        for nombre, resumen in RESUMENES.items():
+            tabla = nombre_resumen(table_name, nombre)
+            medidas = medidas_resumen(connection, table_name, nombre)
+            sql, parametros = consulta_conteos(
+                table_name, resumen["dimensiones"], medidas, {}
+            )
+            cursor.execute(f"DROP TABLE IF EXISTS {tabla}")
+            cursor.execute(f"CREATE TABLE {tabla} AS {sql}", parametros)
+            cursor.execute(f"CREATE INDEX {tabla}_particion ON {tabla} ({PARTICION})")
+
+
+# Meses de ingreso con filas nuevas o modificadas desde la marca
+def particiones_modificadas(connection, table_name, desde):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT {expresion_sql(PARTICION)} FROM {table_name} "
+            "WHERE FECHA_ACTUALIZACION > %s",
+            (desde,),
+        )
+        return [fila[0] for fila in cursor.fetchall()]
+
+
+# Borra las particiones del resumen y las vuelve a agregar desde la tabla
+# origen, que ya tiene el estado vigente de cada fila
+def refrescar_particiones(connection, table_name, particiones):
+    with connection.cursor() as cursor:
+        for nombre, resumen in RESUMENES.items():
+            tabla = nombre_resumen(table_name, nombre)
+            medidas = medidas_resumen(connection, table_name, nombre)
+            filtro = {PARTICION: particiones}
+
+            condiciones, parametros = condiciones_sql(filtro, columna_sql)
+            cursor.execute(
+                f"DELETE FROM {tabla} WHERE {' AND '.join(condiciones)}", parametros
+            )
+
+            sql, parametros = consulta_conteos(
+                table_name, resumen["dimensiones"], medidas, filtro
+            )
+            columnas = ", ".join(
+                f"`{col}`" for col in resumen["dimensiones"] + ["CASOS"] + medidas
+            )
+            cursor.execute(f"INSERT INTO {tabla} ({columnas}) {sql}", parametros)
+
+
+# Casos en el resumen diario: debe coincidir con las filas de la tabla origen
+def casos_resumidos(connection, table_name):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT COALESCE(SUM(CASOS), 0) FROM {nombre_resumen(table_name, 'diario')}"
+        )
+        return int(cursor.fetchone()[0])
+
+
+# Devuelve qué se hizo con la tabla: "completo", "incremental (n meses)" o
+# "sin cambios"
+def actualizar_resumenes(connection, table_name, completo=False):
+    crear_tabla_marcas(connection)
+    marcador = leer_marcador(connection, table_name)
+    marca = leer_marca(connection, table_name)
+
+    if marca is not None and marca["formato"] == FORMATO_RESUMENES and not completo:
+        if marca["marcador"] == marcador:
+            return "sin cambios"
+        desde = marca["marcador"]["actualizacion"]
+        if desde is not None and "FECHA_ACTUALIZACION" in columnas_tabla(
+            connection, table_name
+        ):
+            particiones = particiones_modificadas(connection, table_name, desde)
+            if particiones:
+                refrescar_particiones(connection, table_name, particiones)
+            # Filas borradas o que cambiaron de mes no se detectan por la
+            # marca: si los totales no cuadran se reconstruye todo
+            if casos_resumidos(connection, table_name) == marcador["filas"]:
+                guardar_marca(connection, table_name, marcador)
+                connection.commit()
+                return f"incremental ({len(particiones)} meses)"
+            connection.rollback()
+
+    # Sin marca el dashboard consulta la tabla origen mientras se reconstruye
+    borrar_marca(connection, table_name)
+    connection.commit()
+    reconstruir_resumenes(connection, table_name)
+    guardar_marca(connection, table_name, marcador)
+    connection.commit()
+    return "completo"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Actualiza las tablas resumen del dashboard COVID 19"
+    )
+    parser.add_argument("tablas", nargs="*", default=TABLAS)
+    parser.add_argument(
+        "--completo",
+        action="store_true",
+        help="reconstruye los resúmenes en lugar de actualizarlos",
+    )
+    args = parser.parse_args(argv)
+
+    connection = get_mysql_connection()
+    try:
+        for table_name in args.tablas:
+            inicio = time.perf_counter()
+            resultado = actualizar_resumenes(connection, table_name, args.completo)
+            print(
+                f"{table_name}: {resultado} en {time.perf_counter() - inicio:.1f} s"
+            )
+    finally:
+        connection.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
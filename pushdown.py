@@ -0,0 +1,332 @@
+import numpy as np
+import pandas as pd
+import pymysql
+import streamlit as st
+
+from analytics import (
+    DIMENSIONES_CUBO,
+    DIMENSIONES_SERIE,
+    construir_acumulados,
+    construir_limites,
+    construir_serie,
+)
+from data_loading import (
+    COLUMNAS_COMORBILIDAD,
+    ANCHO_GRUPO_EDAD,
+    GRUPOS_EDAD,
+    INTERVALO_VERIFICACION,
+    MAX_TABLAS_CACHE,
+    SIN_DATO,
+    TIPOS_COLUMNAS,
+    TTL_DATOS,
+    columnas_tabla,
+    conexion_mysql,
+    normalizar_columna,
+)
+
+
+# --- Agregados en MySQL ---
+# Cada gráfica pide conteos agrupados con sus filtros y MySQL los resuelve con
+# un GROUP BY: al proceso de Streamlit solo llega el resultado agregado, nunca
+# la tabla. El resultado tiene el mismo formato que conteos_memoria
+# (analytics.py): una fila por grupo con CASOS y, si se piden, el número de
+# casos con cada comorbilidad.
+
+# Columnas derivadas al cargar en modo memoria, calculadas aquí en SQL.
+# "9999-99-99" (sin fecha) se pasa a NULL antes de STR_TO_DATE: su aviso de
+# fecha inválida es un error en los CREATE/INSERT ... SELECT del ETL con el
+# sql_mode estricto por omisión de MySQL.
+FECHA_SQL = "STR_TO_DATE(NULLIF(`{}`, '9999-99-99'), '%%Y-%%m-%%d')"
+GRUPO_EDAD_SQL = (
+    f"CASE WHEN `EDAD` >= 0 THEN LEAST(FLOOR(`EDAD` / {ANCHO_GRUPO_EDAD}), "
+    f"{GRUPOS_EDAD - 1}) ELSE {SIN_DATO} END"
+)
+EXPRESIONES_SQL = {
+    "DEFUNCION": "(" + FECHA_SQL.format("FECHA_DEF") + " IS NOT NULL)",
+    "FECHA_INGRESO": FECHA_SQL.format("FECHA_INGRESO"),
+    "MES_INGRESO": "MONTH(" + FECHA_SQL.format("FECHA_INGRESO") + ")",
+    "DIAS_SINTOMAS_INGRESO": "DATEDIFF("
+    + FECHA_SQL.format("FECHA_INGRESO")
+    + ", "
+    + FECHA_SQL.format("FECHA_SINTOMAS")
+    + ")",
+    "GRUPO_EDAD": GRUPO_EDAD_SQL,
+}
+
+# Columnas de agrupación que se entregan con el tipo compacto del modo
+# memoria (NULL → SIN_DATO)
+TIPOS_GRUPOS = {
+    **{
+        col: tipo
+        for col, tipo in TIPOS_COLUMNAS.items()
+        if np.dtype(tipo).kind == "i"
+    },
+    "MES_INGRESO": np.int8,
+    "GRUPO_EDAD": np.int8,
+}
+MAX_CONSULTAS_CACHE = 256
+
+
+def expresion_sql(columna):
+    return EXPRESIONES_SQL.get(columna, f"`{columna}`")
+
+
+# En las tablas resumen las columnas derivadas ya están materializadas, salvo
+# GRUPO_EDAD, que se calcula de EDAD
+EXPRESIONES_RESUMEN = {"GRUPO_EDAD": GRUPO_EDAD_SQL}
+COLUMNAS_RESUMEN = {"GRUPO_EDAD": "EDAD"}
+
+
+def columna_sql(columna):
+    return EXPRESIONES_RESUMEN.get(columna, f"`{columna}`")
+
+
+# Filtros {columna: valor o lista de valores} como condiciones con parámetros.
+# None en la lista de valores selecciona también los NULL.
+def condiciones_sql(filtros, expresion=expresion_sql):
+    condiciones = []
+    parametros = []
+    for col, valor in filtros.items():
+        valores = list(valor) if isinstance(valor, (list, tuple, set)) else [valor]
+        nulos = None in valores
+        valores = [v for v in valores if v is not None]
+        partes = []
+        if valores:
+            marcas = ", ".join(["%s"] * len(valores))
+            partes.append(f"{expresion(col)} IN ({marcas})")
+        if nulos:
+            partes.append(f"{expresion(col)} IS NULL")
+        condiciones.append("(" + " OR ".join(partes) + ")" if nulos else partes[0])
+        parametros.extend(valores)
+    return condiciones, parametros
+
+
+# resumen=True consulta una tabla resumen: CASOS y las comorbilidades ya son
+# conteos, así que se suman en lugar de contar filas. rangos
+# {columna: (desde, hasta)} limita cada columna a sus valores entre desde y
+# hasta, inclusive.
+def consulta_conteos(table_name, grupos, medidas, filtros, resumen=False, rangos=None):
+    expresion = columna_sql if resumen else expresion_sql
+    columnas = [f"{expresion(col)} AS `{col}`" for col in grupos]
+    if resumen:
+        columnas.append("SUM(`CASOS`) AS `CASOS`")
+        columnas += [f"SUM(`{col}`) AS `{col}`" for col in medidas]
+    else:
+        columnas.append("COUNT(*) AS `CASOS`")
+        columnas += [f"SUM(`{col}` = 1) AS `{col}`" for col in medidas]
+    sql = f"SELECT {', '.join(columnas)} FROM `{table_name}`"
+    condiciones, parametros = condiciones_sql(filtros, expresion)
+    for col, (desde, hasta) in (rangos or {}).items():
+        condiciones.append(f"{expresion(col)} BETWEEN %s AND %s")
+        parametros.extend([desde, hasta])
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    if grupos:
+        sql += " GROUP BY " + ", ".join(str(i + 1) for i in range(len(grupos)))
+    return sql, parametros
+
+
+# --- Tablas resumen ---
+# Agregados de cada año que mantiene etl.py junto a la tabla origen
+# (<tabla>_resumen_<nombre>), de la más pequeña a la más grande. Cada una
+# guarda CASOS y las medidas por combinación de sus dimensiones; MES_INGRESO
+# es la partición que el ETL recalcula en cada actualización incremental.
+FORMATO_RESUMENES = 2  # Se incrementa cuando cambian las definiciones
+TABLA_MARCAS = "etl_marcas"
+RESUMENES = {
+    "sintomas": {
+        "dimensiones": ["MES_INGRESO", "DIAS_SINTOMAS_INGRESO", "REGION", "ENTIDAD"],
+        "medidas": [],
+    },
+    "intubacion_edad": {
+        "dimensiones": ["MES_INGRESO", "EDAD", "REGION", "ENTIDAD", "INTUBADO"],
+        "medidas": [],
+    },
+    "edad": {
+        "dimensiones": [
+            "MES_INGRESO",
+            "EDAD",
+            "REGION",
+            "ENTIDAD",
+            "CLASIFICACION_FINAL",
+            "SEXO",
+            "TIPO_PACIENTE",
+        ],
+        "medidas": [],
+    },
+    "kpis_edad": {
+        "dimensiones": [
+            "MES_INGRESO",
+            "EDAD",
+            "REGION",
+            "ENTIDAD",
+            "CLASIFICACION_FINAL",
+            "SEXO",
+            "TIPO_PACIENTE",
+            "DEFUNCION",
+        ],
+        "medidas": COLUMNAS_COMORBILIDAD,
+    },
+    "diario": {
+        "dimensiones": [
+            "FECHA_INGRESO",
+            "MES_INGRESO",
+            "REGION",
+            "ENTIDAD",
+            "CLASIFICACION_FINAL",
+            "SEXO",
+            "TIPO_PACIENTE",
+            "INTUBADO",
+            "DEFUNCION",
+        ],
+        "medidas": COLUMNAS_COMORBILIDAD,
+    },
+}
+
+
+def nombre_resumen(table_name, nombre):
+    return f"{table_name}_resumen_{nombre}"
+
+
+# Primera tabla resumen con todas las columnas que usa la consulta
+def tabla_resumen(grupos, medidas, filtros, rangos=None):
+    usadas = {
+        COLUMNAS_RESUMEN.get(col, col)
+        for col in list(grupos) + list(filtros) + list(rangos or {})
+    }
+    for nombre, resumen in RESUMENES.items():
+        if usadas <= set(resumen["dimensiones"]) and set(medidas) <= set(
+            resumen["medidas"]
+        ):
+            return nombre
+    return None
+
+
+# Marcador de la tabla origen con el que el ETL generó los resúmenes
+def leer_marca(connection, table_name):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT filas, actualizacion, formato FROM {TABLA_MARCAS} "
+            "WHERE tabla = %s",
+            (table_name,),
+        )
+        fila = cursor.fetchone()
+    if fila is None:
+        return None
+    filas, actualizacion, formato = fila
+    return {
+        "marcador": {"filas": int(filas), "actualizacion": actualizacion},
+        "formato": int(formato),
+    }
+
+
+# Los resúmenes solo se usan si corresponden a la versión vigente de la tabla
+# origen (mismo marcador que clave_tabla); si no, se consulta la tabla origen.
+# PoolAgotado se propaga para no guardar False en cache por un pool ocupado.
+@st.cache_data(ttl=INTERVALO_VERIFICACION, show_spinner=False)
+def resumenes_vigentes(table_name, clave):
+    marcador = clave[1]
+    if marcador is None:
+        return False
+    try:
+        with conexion_mysql() as connection:
+            marca = leer_marca(connection, table_name)
+    except pymysql.MySQLError:
+        return False
+    return (
+        marca is not None
+        and marca["formato"] == FORMATO_RESUMENES
+        and marca["marcador"] == marcador
+    )
+
+
+# clave (ver clave_tabla) solo forma parte de la clave de cache: si la tabla
+# se invalida o cambia en MySQL, la consulta se vuelve a ejecutar.
+@st.cache_data(ttl=TTL_DATOS, max_entries=MAX_CONSULTAS_CACHE, show_spinner=False)
+def conteos_sql(table_name, clave, grupos, medidas=(), rangos=None, **filtros):
+    grupos = list(grupos)
+    medidas = list(medidas)
+    # Antes de tomar la conexión: resumenes_vigentes usa una propia
+    vigentes = resumenes_vigentes(table_name, clave)
+    with conexion_mysql() as connection:
+        if medidas:
+            existentes = set(columnas_tabla(connection, table_name))
+            medidas = [col for col in medidas if col in existentes]
+        resumen = tabla_resumen(grupos, medidas, filtros, rangos) if vigentes else None
+        if resumen is None:
+            sql, parametros = consulta_conteos(
+                table_name, grupos, medidas, filtros, rangos=rangos
+            )
+        else:
+            sql, parametros = consulta_conteos(
+                nombre_resumen(table_name, resumen),
+                grupos,
+                medidas,
+                filtros,
+                resumen=True,
+                rangos=rangos,
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, parametros)
+            filas = cursor.fetchall()
+
+    resultado = pd.DataFrame(list(filas), columns=grupos + ["CASOS"] + medidas)
+    for col in ["CASOS"] + medidas:
+        resultado[col] = pd.to_numeric(resultado[col]).fillna(0).astype(np.int64)
+    for col in grupos:
+        if col in TIPOS_GRUPOS:
+            resultado[col] = normalizar_columna(resultado[col], TIPOS_GRUPOS[col])
+        elif col == "DEFUNCION":
+            resultado[col] = resultado[col].astype(bool)
+        elif col == "FECHA_INGRESO":
+            resultado[col] = pd.to_datetime(resultado[col], errors="coerce")
+        elif col == "DIAS_SINTOMAS_INGRESO":
+            resultado[col] = pd.to_numeric(resultado[col]).astype(np.float32)
+    return resultado
+
+
+# Serie diaria del año (ver construir_serie en analytics.py) a partir de los
+# casos por día y combinación, que salen del resumen diario si está vigente
+@st.cache_data(ttl=TTL_DATOS, max_entries=MAX_TABLAS_CACHE, show_spinner=False)
+def serie_diaria_sql(table_name, clave):
+    conteos = conteos_sql(table_name, clave, ["FECHA_INGRESO"] + DIMENSIONES_SERIE)
+    return construir_serie(conteos, conteos["CASOS"])
+
+
+# Conteos acumulados por edad del año (ver construir_acumulados en
+# analytics.py), a partir del resumen kpis_edad si está vigente
+@st.cache_data(ttl=TTL_DATOS, max_entries=MAX_TABLAS_CACHE, show_spinner=False)
+def acumulados_edad_sql(table_name, clave):
+    return construir_acumulados(
+        conteos_sql(
+            table_name, clave, DIMENSIONES_CUBO + ["EDAD"], COLUMNAS_COMORBILIDAD
+        )
+    )
+
+
+# Límites de los controles de la barra lateral (ver construir_limites en
+# analytics.py) con un MIN/MAX por columna, sobre la tabla resumen más pequeña
+# que la tenga si está vigente
+@st.cache_data(ttl=TTL_DATOS, max_entries=MAX_TABLAS_CACHE, show_spinner=False)
+def limites_sql(table_name, clave):
+    vigentes = resumenes_vigentes(table_name, clave)
+    valores = {}
+    with conexion_mysql() as connection:
+        for col in ["FECHA_INGRESO", "EDAD"]:
+            resumen = tabla_resumen([col], [], {}) if vigentes else None
+            if resumen is None:
+                origen, expresion = table_name, expresion_sql(col)
+            else:
+                origen = nombre_resumen(table_name, resumen)
+                expresion = columna_sql(col)
+            # Con parámetros (aunque no haya) pymysql convierte %% en %
+            sql = f"SELECT MIN({expresion}), MAX({expresion}) FROM `{origen}`"
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [])
+                valores[col] = cursor.fetchone()
+    fechas = pd.to_datetime(pd.Series(valores["FECHA_INGRESO"]), errors="coerce")
+    edad = valores["EDAD"][1]
+    return construir_limites(
+        fechas.to_numpy().astype("datetime64[D]"),
+        None if edad is None else int(edad),
+    )
@@ -0,0 +1,890 @@
+import io
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import matplotlib
+import matplotlib.pyplot as plt
+import matplotlib.ticker as ticker
+import numpy as np
+import seaborn as sns
+import streamlit as st
+
+
+# --- Caché de figuras ---
+# PNG ya renderizados, compartidos entre sesiones. La clave identifica la
+# gráfica, la versión de los datos, los filtros y los selectores; si no
+# cambió ninguno, la figura se sirve sin volver a tocar matplotlib.
+# Se desalojan las menos usadas (LRU) al pasar de MAX_BYTES_FIGURAS.
+MAX_BYTES_FIGURAS = 64 * 1024 * 1024
+
+
+@st.cache_resource(show_spinner=False)
+def cache_figuras():
+    return {"figuras": OrderedDict(), "bytes": 0, "lock": threading.Lock()}
+
+
+def obtener_figura(cache, clave):
+    with cache["lock"]:
+        png = cache["figuras"].get(clave)
+        if png is not None:
+            cache["figuras"].move_to_end(clave)
+        return png
+
+
+def guardar_figura(cache, clave, png):
+    with cache["lock"]:
+        anterior = cache["figuras"].pop(clave, None)
+        if anterior is not None:
+            cache["bytes"] -= len(anterior)
+        cache["figuras"][clave] = png
+        cache["bytes"] += len(png)
+        while cache["bytes"] > MAX_BYTES_FIGURAS and len(cache["figuras"]) > 1:
+            _, desalojada = cache["figuras"].popitem(last=False)
+            cache["bytes"] -= len(desalojada)
+
+
+# Clave de una figura: id de la gráfica, tabla y clave_tabla (versión de los
+# datos), filtros y valores de los selectores. Se usa repr porque el marcador
+# de la tabla es un diccionario.
+def clave_figura(id_grafica, table_name, clave, filtros, *selectores):
+    return repr((id_grafica, table_name, clave, sorted(filtros.items()), selectores))
+
+
+# Mismos parámetros de savefig que usa st.pyplot
+def figura_png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight", dpi=200)
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+# --- Renderizado en paralelo ---
+# Las figuras que no están en caché se dibujan en un pool de procesos con el
+# backend Agg; el script solo calcula los agregados. Por omisión se deja un
+# núcleo libre para el script; con 0 workers (máquinas de un núcleo) se dibujan
+# en el hilo del script.
+WORKERS_GRAFICAS = int(
+    os.environ.get("COVID19_WORKERS_GRAFICAS", min((os.cpu_count() or 1) - 1, 8))
+)
+
+
+def iniciar_worker():
+    matplotlib.use("Agg")
+
+
+@st.cache_resource(show_spinner=False)
+def pool_graficas():
+    if WORKERS_GRAFICAS <= 0:
+        return None
+    return ProcessPoolExecutor(
+        max_workers=WORKERS_GRAFICAS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=iniciar_worker,
+    )
+
+
+# Un pool roto o que falla se cierra (sus procesos terminan) antes de
+# descartarlo; la siguiente figura crea uno nuevo.
+def descartar_pool(pool):
+    pool.shutdown(wait=False, cancel_futures=True)
+    if pool_graficas() is pool:
+        pool_graficas.clear()
+
+
+def renderizar_png(render, datos, args):
+    return figura_png(render(datos, *args))
+
+
+# Encarga el dibujo al pool; None si no hay pool (se dibuja al resolver)
+def encargar_figura(pool, render, datos, args):
+    if pool is None:
+        return None
+    try:
+        return pool.submit(renderizar_png, render, datos, args)
+    except (BrokenProcessPool, RuntimeError):
+        descartar_pool(pool)
+        return None
+
+
+# PNG de un pedido: el resultado del pool o, si el pool se rompió, el dibujo
+# en el hilo del script. Se guarda en la caché de figuras.
+def resolver_figura(cache, pedido):
+    png = None
+    if pedido["futuro"] is not None:
+        try:
+            png = pedido["futuro"].result()
+        except BrokenProcessPool:
+            descartar_pool(pedido["pool"])
+    if png is None:
+        png = renderizar_png(pedido["render"], pedido["datos"], pedido["args"])
+    guardar_figura(cache, pedido["clave"], png)
+    return png
+
+
+# Tanda de figuras de una ejecución completa del script: las que faltan en la
+# caché se encargan al pool en cuanto se calcula su agregado y dejan un
+# marcador (st.empty con ESQUELETO_FIGURA) en su lugar; completar_tanda las
+# espera en orden y las coloca. Con la tanda cerrada (reruns de un fragmento) la figura se espera
+# en el momento.
+def nueva_tanda():
+    return {"pendientes": [], "abierta": True}
+
+
+def completar_tanda(tanda):
+    cache = cache_figuras()
+    tanda["abierta"] = False
+    for pedido in tanda["pendientes"]:
+        pedido["marcador"].image(resolver_figura(cache, pedido), width="stretch")
+    tanda["pendientes"].clear()
+
+
+# Marcador que ocupa el lugar de una figura mientras se calcula y dibuja
+ESQUELETO_FIGURA = """
+<div style="background-color: #1e1e2f; border-radius: 10px; aspect-ratio: 2 / 1;
+            display: flex; align-items: center; justify-content: center;
+            color: rgba(255, 255, 255, 0.6); animation: pulso 1.5s ease-in-out infinite;">
+    Cargando gráfica...
+</div>
+<style>
+@keyframes pulso { 0%, 100% { opacity: 1; } 50% { opacity: 0.5; } }
+</style>
+"""
+
+
+# Muestra la figura de la caché o la construye: agregar() calcula los datos
+# de la gráfica y render(datos, *args) dibuja la figura. Con la figura en
+# caché no se calcula el agregado ni se renderiza; si no, el esqueleto ocupa
+# su lugar hasta que la figura está lista.
+def mostrar_figura(tanda, clave, render, agregar, *args):
+    cache = cache_figuras()
+    png = obtener_figura(cache, clave)
+    if png is not None:
+        st.image(png, width="stretch")
+        return
+    marcador = st.empty()
+    marcador.markdown(ESQUELETO_FIGURA, unsafe_allow_html=True)
+    datos = agregar()
+    pool = pool_graficas()
+    pedido = {
+        "clave": clave,
+        "render": render,
+        "datos": datos,
+        "args": args,
+        "pool": pool,
+        "futuro": encargar_figura(pool, render, datos, args),
+        "marcador": marcador,
+    }
+    if tanda["abierta"]:
+        tanda["pendientes"].append(pedido)
+    else:
+        marcador.image(resolver_figura(cache, pedido), width="stretch")
+
+
+MESES = [
+    "Ene",
+    "Feb",
+    "Mar",
+    "Abr",
+    "May",
+    "Jun",
+    "Jul",
+    "Ago",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dic",
+]
+
+
+# --- Gráfico Edad-Sexo ---
+def grafica_edad_sexo(conteo, tipo_caso):
+    plt.style.use("dark_background")
+    fig, ax = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
+    fig.patch.set_facecolor("#1e1e2f")
+    color_hombres = "#3498db"  # Azul para hombres
+    color_mujeres = "#e74c3c"  # Rojo para mujeres
+    sns.barplot(
+        data=conteo,
+        x="RANGO_EDAD",
+        y="CASOS",
+        hue="SEXO",
+        palette={"Hombres": color_hombres, "Mujeres": color_mujeres},
+        alpha=0.8,
+        ax=ax,
+    )
+    ax.set_facecolor("#1e1e2f")
+    ax.set_title(
+        f"Distribución por Edad y Sexo - {tipo_caso}", fontsize=16, pad=20, color="white"
+    )
+    ax.set_xlabel("Rango de Edad", fontsize=12, color="white")
+    ax.set_ylabel("Número de Casos", fontsize=12, color="white")
+    plt.xticks(rotation=45, ha="right", color="white")
+    plt.yticks(color="white")
+    ax.grid(axis="y", linestyle="--", alpha=0.3, color="gray")
+    legend = ax.legend(title="Género", frameon=True, facecolor="#222244", edgecolor="gray")
+    legend.get_title().set_color("white")
+    for text in legend.get_texts():
+        text.set_color("white")
+    for bar in ax.patches:
+        bar.set_edgecolor("white")
+        bar.set_linewidth(0.5)
+    for spine in ax.spines.values():
+        spine.set_edgecolor("gray")
+        spine.set_linewidth(0.5)
+    for bar in ax.patches:
+        height = bar.get_height()
+        if height > 0:
+            if height > max(conteo["CASOS"]) * 0.05:
+                ax.text(
+                    bar.get_x() + bar.get_width() / 2.0,
+                    bar.get_height() + 5,
+                    f"{int(height):,}",
+                    ha="center",
+                    va="bottom",
+                    color="white",
+                    fontsize=8,
+                )
+    plt.tight_layout()
+    return fig
+
+
+# --- Gráfico Edad - Tipo de Paciente ---
+def grafica_edad_tipo_paciente(conteo_tp, tipo_caso_tp):
+    plt.style.use("dark_background")
+    fig2, ax2 = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
+    fig2.patch.set_facecolor("#1e1e2f")
+    color_ambulatorio = "#2ecc71"  # Verde para ambulatorios
+    color_hospitalizado = "#e67e22"  # Naranja para hospitalizados
+    sns.barplot(
+        data=conteo_tp,
+        x="RANGO_EDAD",
+        y="CASOS",
+        hue="TIPO_PACIENTE",
+        palette={"Ambulatorios": color_ambulatorio, "Hospitalizados": color_hospitalizado},
+        alpha=0.8,
+        ax=ax2,
+    )
+    ax2.set_facecolor("#1e1e2f")
+    ax2.set_title(
+        f"Distribución por Edad y Tipo de Atención - {tipo_caso_tp}",
+        fontsize=16,
+        pad=20,
+        color="white",
+    )
+    ax2.set_xlabel("Rango de Edad", fontsize=12, color="white")
+    ax2.set_ylabel("Número de Casos", fontsize=12, color="white")
+    plt.xticks(rotation=45, ha="right", color="white")
+    plt.yticks(color="white")
+    ax2.grid(axis="y", linestyle="--", alpha=0.3, color="gray")
+    legend = ax2.legend(
+        title="Tipo de Atención", frameon=True, facecolor="#222244", edgecolor="gray"
+    )
+    legend.get_title().set_color("white")
+    for text in legend.get_texts():
+        text.set_color("white")
+    for bar in ax2.patches:
+        bar.set_edgecolor("white")
+        bar.set_linewidth(0.5)
+    for spine in ax2.spines.values():
+        spine.set_edgecolor("gray")
+        spine.set_linewidth(0.5)
+    for bar in ax2.patches:
+        height = bar.get_height()
+        if height > 0:
+            if height > max(conteo_tp["CASOS"]) * 0.05:
+                ax2.text(
+                    bar.get_x() + bar.get_width() / 2.0,
+                    bar.get_height() + 5,
+                    f"{int(height):,}",
+                    ha="center",
+                    va="bottom",
+                    color="white",
+                    fontsize=8,
+                )
+    plt.tight_layout()
+    return fig2
+
+
+# --- Gráfica de pastel: Porcentaje de enfermedades en casos confirmados ---
+# datos = (porcentajes, total_casos, porc_con_comorbilidad)
+def grafica_comorbilidades_confirmados(datos):
+    porcentajes, total_casos, porc_con_comorbilidad = datos
+    colors = [
+        "#3498db",
+        "#e74c3c",
+        "#2ecc71",
+        "#f39c12",
+        "#9b59b6",
+        "#1abc9c",
+        "#e67e22",
+        "#34495e",
+        "#7f8c8d",
+        "#d35400",
+    ]
+
+    plt.style.use("dark_background")
+    fig_pie, ax_pie = plt.subplots(figsize=(10, 8), facecolor="#1e1e2f")
+    fig_pie.patch.set_facecolor("#1e1e2f")
+    wedges, texts, autotexts = ax_pie.pie(
+        porcentajes.values(),
+        labels=None,
+        autopct="%1.1f%%",
+        startangle=90,
+        wedgeprops=dict(width=0.5, edgecolor="white", linewidth=0.5),
+        pctdistance=0.95,
+        colors=colors[: len(porcentajes)],
+    )
+
+    for autotext in autotexts:
+        autotext.set_color("white")
+        autotext.set_fontsize(7)
+        autotext.set_weight("bold")
+
+    centre_circle = plt.Circle((0, 0), 0.35, fc="#1e1e2f")
+    ax_pie.add_patch(centre_circle)
+    ax_pie.annotate(
+        "Comorbilidades",
+        xy=(0, 0),
+        ha="center",
+        va="center",
+        fontsize=14,
+        fontweight="bold",
+        color="white",
+    )
+
+    ax_pie.legend(
+        wedges,
+        [f"{k} ({v}%)" for k, v in porcentajes.items()],
+        title="Comorbilidades",
+        loc="center left",
+        bbox_to_anchor=(1, 0, 0.5, 1),
+        frameon=True,
+        facecolor="#222244",
+        edgecolor="gray",
+        fontsize=10,
+    )
+
+    ax_pie.set_title(
+        "Distribución de Comorbilidades en Casos Confirmados",
+        fontsize=16,
+        pad=20,
+        color="white",
+    )
+    ax_pie.axis("equal")
+
+    # Información adicional
+    fig_pie.text(
+        0.5,
+        0.02,
+        f"Total de casos analizados: {total_casos:,} | Casos con al menos una comorbilidad: {porc_con_comorbilidad}%",
+        ha="center",
+        color="white",
+        fontsize=10,
+        alpha=0.7,
+    )
+    return fig_pie
+
+
+# === Gráfico de Línea - Intubados por mes (empezando en 0 en enero y febrero) ===
+def grafica_intubados_mes(pivot_intubado):
+    etiquetas = {1: "Sí", 2: "No"}
+
+    plt.style.use("dark_background")
+    fig, ax = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
+    fig.patch.set_facecolor("#1e1e2f")
+    color_intubado_si = "#e74c3c"  # Rojo para intubados
+    color_intubado_no = "#2ecc71"  # Verde para no intubados
+    colores = {1: color_intubado_si, 2: color_intubado_no}
+    for col in pivot_intubado.columns:
+        ax.plot(
+            pivot_intubado.index,
+            pivot_intubado[col],
+            marker="o",
+            markersize=8,
+            linewidth=3,
+            color=colores.get(col, "#ffffff"),
+            label=f"Intubado: {etiquetas.get(col, col)}",
+            alpha=0.9,
+        )
+    ax.set_facecolor("#1e1e2f")
+    ax.set_title(
+        "Evolución Mensual de Pacientes Intubados", fontsize=18, pad=20, color="white"
+    )
+    ax.set_xlabel("Mes", fontsize=14, color="white", labelpad=10)
+    ax.set_ylabel("Número de Pacientes", fontsize=14, color="white", labelpad=10)
+    ax.set_xticks(range(1, 13))
+    ax.set_xticklabels(MESES, color="white", fontsize=12)
+    ax.tick_params(axis="y", colors="white", labelsize=12)
+    ax.grid(axis="both", linestyle="--", alpha=0.3, color="gray")
+
+    legend = ax.legend(
+        title="Estado de Intubación",
+        frameon=True,
+        facecolor="#222244",
+        edgecolor="gray",
+        fontsize=12,
+        loc="upper left",
+    )
+    legend.get_title().set_color("white")
+    legend.get_title().set_fontsize(13)
+    for text in legend.get_texts():
+        text.set_color("white")
+
+    for col in pivot_intubado.columns:
+        for mes, valor in enumerate(pivot_intubado[col], 1):
+            if valor > 0:
+                ax.annotate(
+                    f"{int(valor):,}",
+                    xy=(mes, valor),
+                    xytext=(
+                        0,
+                        10 if col == 1 else -20,
+                    ),
+                    textcoords="offset points",
+                    ha="center",
+                    va="bottom" if col == 1 else "top",
+                    color="white",
+                    fontsize=9,
+                    bbox=dict(boxstyle="round,pad=0.3", fc="#222244", alpha=0.7, ec="gray"),
+                )
+
+    for spine in ax.spines.values():
+        spine.set_edgecolor("gray")
+        spine.set_linewidth(0.5)
+
+    plt.tight_layout()
+    return fig
+
+
+# --- Casos sospechosos, probables y negativos por mes ---
+def grafica_sospechosos_mes(pivotado):
+    colores_clasif = {3: "#f39c12", 6: "#3498db", 7: "#2ecc71"}  # Naranja  # Azul  # Verde
+    nombres_clasif = {3: "Sospechoso", 6: "Probable", 7: "Negativo"}
+
+    plt.style.use("dark_background")
+    fig, ax = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
+    fig.patch.set_facecolor("#1e1e2f")
+
+    x = np.arange(len(MESES))
+    width = 0.25
+    offset = 0
+    for i, clasif in enumerate(pivotado.columns):
+        bars = ax.bar(
+            x + offset,
+            pivotado[clasif],
+            width,
+            label=nombres_clasif.get(clasif, f"Clase {clasif}"),
+            color=colores_clasif.get(clasif, "#ffffff"),
+            edgecolor="white",
+            linewidth=0.5,
+            alpha=0.8,
+        )
+
+        umbral = (
+            max(pivotado[clasif]) * 0.1
+        )  # Solo mostrar valores para barras con > 10% del máximo
+        for j, bar in enumerate(bars):
+            height = bar.get_height()
+            if height > umbral:
+                ax.text(
+                    bar.get_x() + bar.get_width() / 2,
+                    height + 5,
+                    f"{int(height):,}",
+                    ha="center",
+                    va="bottom",
+                    color="white",
+                    fontsize=8,
+                    rotation=0,
+                    bbox=dict(boxstyle="round,pad=0.2", fc="#222244", alpha=0.7, ec="gray"),
+                )
+        offset += width
+
+    ax.set_facecolor("#1e1e2f")
+    ax.set_title(
+        "Evolución Mensual de Casos por Tipo de Clasificación",
+        fontsize=16,
+        pad=20,
+        color="white",
+    )
+    ax.set_xlabel("Mes", fontsize=12, color="white")
+    ax.set_ylabel("Número de Pacientes", fontsize=12, color="white")
+    ax.set_xticks(x + width)
+    ax.set_xticklabels(MESES, color="white")
+    ax.tick_params(axis="y", colors="white")
+    ax.grid(axis="y", linestyle="--", alpha=0.3, color="gray")
+    legend = ax.legend(
+        title="Clasificación Final",
+        frameon=True,
+        facecolor="#222244",
+        edgecolor="gray",
+        fontsize=10,
+        loc="upper left",
+    )
+    legend.get_title().set_color("white")
+    for text in legend.get_texts():
+        text.set_color("white")
+    for spine in ax.spines.values():
+        spine.set_edgecolor("gray")
+        spine.set_linewidth(0.5)
+
+    plt.tight_layout()
+    return fig
+
+
+# --- Curva epidémica: casos y defunciones por fecha de ingreso ---
+def grafica_curva_epidemica(curva, tipo_caso, titulo_periodo):
+    colores = {"CASOS": "#3498db", "DEFUNCIONES": "#e74c3c"}
+    nombres = {"CASOS": tipo_caso, "DEFUNCIONES": "Defunciones"}
+
+    plt.style.use("dark_background")
+    fig, ax = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
+    fig.patch.set_facecolor("#1e1e2f")
+
+    for col in ["CASOS", "DEFUNCIONES"]:
+        promedio = f"PROMEDIO_{col}"
+        ax.plot(
+            curva.index,
+            curva[col],
+            color=colores[col],
+            linewidth=1 if promedio in curva else 2.5,
+            alpha=0.35 if promedio in curva else 0.9,
+            label=nombres[col],
+        )
+        if promedio in curva:
+            ax.plot(
+                curva.index,
+                curva[promedio],
+                color=colores[col],
+                linewidth=3,
+                alpha=0.9,
+                label=f"{nombres[col]} (promedio móvil)",
+            )
+
+    ax.set_facecolor("#1e1e2f")
+    ax.set_title(
+        f"Curva Epidémica {titulo_periodo} - {tipo_caso}",
+        fontsize=16,
+        pad=20,
+        color="white",
+    )
+    ax.set_xlabel("Fecha de Ingreso", fontsize=12, color="white")
+    ax.set_ylabel("Número de Pacientes", fontsize=12, color="white")
+    ax.tick_params(axis="both", colors="white", labelsize=10)
+    ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda x, _: f"{int(x):,}"))
+    ax.grid(axis="both", linestyle="--", alpha=0.3, color="gray")
+    fig.autofmt_xdate()
+
+    legend = ax.legend(
+        frameon=True,
+        facecolor="#222244",
+        edgecolor="gray",
+        fontsize=10,
+        loc="upper left",
+    )
+    for text in legend.get_texts():
+        text.set_color("white")
+
+    for spine in ax.spines.values():
+        spine.set_edgecolor("gray")
+        spine.set_linewidth(0.5)
+
+    plt.tight_layout()
+    return fig
+
+
+# --- Gráfico de barras horizontales: comorbilidades en confirmados o fallecidos ---
+def grafica_comorbilidades_grupo(df_comorb_plot, tipo_comparacion):
+    plt.style.use("dark_background")
+    fig, ax = plt.subplots(figsize=(12, 8), facecolor="#1e1e2f")
+    fig.patch.set_facecolor("#1e1e2f")
+    cmap = plt.cm.get_cmap(
+        "YlOrRd" if tipo_comparacion == "Casos Fallecidos" else "YlGnBu"
+    )
+    colors = cmap(np.linspace(0.3, 1.0, len(df_comorb_plot)))
+    bars = ax.barh(
+        df_comorb_plot.index,
+        df_comorb_plot["Pacientes"],
+        color=colors,
+        edgecolor="white",
+        linewidth=0.5,
+        alpha=0.8,
+    )
+
+    ax.set_facecolor("#1e1e2f")
+    ax.set_title(
+        f"Comorbilidades en {tipo_comparacion}", fontsize=16, pad=20, color="white"
+    )
+    ax.set_xlabel("Número de Pacientes", fontsize=12, color="white")
+    ax.set_ylabel("Comorbilidad", fontsize=12, color="white")
+    for i, bar in enumerate(bars):
+        width = bar.get_width()
+        label_text = f"{int(width):,} ({df_comorb_plot['Porcentaje'].iloc[i]:.1f}%)"
+        ax.text(
+            width + (max(df_comorb_plot["Pacientes"]) * 0.02),
+            bar.get_y() + bar.get_height() / 2,
+            label_text,
+            va="center",
+            ha="left",
+            color="white",
+            fontsize=10,
+            bbox=dict(boxstyle="round,pad=0.3", fc="#222244", alpha=0.7, ec="gray"),
+        )
+
+    ax.tick_params(axis="both", colors="white")
+    ax.grid(axis="x", linestyle="--", alpha=0.3, color="gray")
+
+    for spine in ax.spines.values():
+        spine.set_edgecolor("gray")
+        spine.set_linewidth(0.5)
+
+    plt.tight_layout()
+    return fig
+
+
+# --- Distribución de casos por rango de edad ---
+def grafica_rango_edad(conteo_rangos):
+    plt.style.use("dark_background")
+    fig, ax = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
+    fig.patch.set_facecolor("#1e1e2f")
+    gradient_colors = plt.cm.viridis(np.linspace(0, 0.8, len(conteo_rangos)))
+    ax.bar(
+        range(len(conteo_rangos)),
+        conteo_rangos.values,
+        color=gradient_colors,
+        edgecolor="white",
+        linewidth=0.5,
+        alpha=0.8,
+    )
+
+    ax.set_facecolor("#1e1e2f")
+    ax.set_title(
+        "Distribución de Casos por Rango de Edad", fontsize=16, pad=20, color="white"
+    )
+    ax.set_xlabel("Rango de Edad", fontsize=12, color="white", labelpad=10)
+    ax.set_ylabel("Número de Casos", fontsize=12, color="white", labelpad=10)
+    ax.set_xticks(range(len(conteo_rangos)))
+    ax.set_xticklabels(
+        conteo_rangos.index, rotation=45, ha="right", color="white", fontsize=10
+    )
+    ax.tick_params(axis="y", colors="white", labelsize=10)
+    ax.grid(axis="y", linestyle="--", alpha=0.3, color="gray")
+    umbral = (
+        max(conteo_rangos) * 0.05
+    )  # Solo mostrar valores para barras con > 5% del máximo
+
+    for i, v in enumerate(conteo_rangos.values):
+        if v > umbral:
+            ax.text(
+                i,
+                v + (max(conteo_rangos) * 0.01),
+                f"{int(v):,}",
+                ha="center",
+                va="bottom",
+                color="white",
+                fontsize=9,
+                rotation=0,
+                bbox=dict(boxstyle="round,pad=0.3", fc="#222244", alpha=0.7, ec="gray"),
+            )
+    for spine in ax.spines.values():
+        spine.set_edgecolor("gray")
+        spine.set_linewidth(0.5)
+
+    plt.tight_layout()
+    return fig
+
+
+# --- Distribución de comorbilidades en pacientes fallecidos ---
+# datos = (conteo_comorb, total_fallecidos, total_comorbilidades)
+def grafica_comorbilidades_fallecidos(datos):
+    conteo_comorb, total_fallecidos, total_comorbilidades = datos
+    colors = [
+        "#e74c3c",
+        "#3498db",
+        "#2ecc71",
+        "#f39c12",
+        "#9b59b6",
+        "#1abc9c",
+        "#e67e22",
+        "#34495e",
+        "#7f8c8d",
+        "#d35400",
+    ]
+
+    plt.style.use("dark_background")
+    fig, ax = plt.subplots(figsize=(10, 8), facecolor="#1e1e2f")
+    fig.patch.set_facecolor("#1e1e2f")
+    wedges, texts, autotexts = ax.pie(
+        conteo_comorb.values(),
+        labels=None,
+        autopct="%1.1f%%",
+        startangle=90,
+        wedgeprops=dict(width=0.5, edgecolor="white", linewidth=0.5),
+        pctdistance=0.85,
+        colors=colors[: len(conteo_comorb)],
+    )
+
+    for autotext in autotexts:
+        autotext.set_color("white")
+        autotext.set_fontsize(7)
+        autotext.set_weight("bold")
+    centre_circle = plt.Circle((0, 0), 0.35, fc="#1e1e2f")
+    ax.add_patch(centre_circle)
+    ax.annotate(
+        f"{total_fallecidos:,}\nFallecidos",
+        xy=(0, 0),
+        ha="center",
+        va="center",
+        fontsize=14,
+        fontweight="bold",
+        color="white",
+    )
+
+    ax.legend(
+        wedges,
+        [f"{k} ({int(v):,})" for k, v in conteo_comorb.items()],
+        title="Comorbilidades",
+        loc="center left",
+        bbox_to_anchor=(1, 0, 0.5, 1),
+        frameon=True,
+        facecolor="#222244",
+        edgecolor="gray",
+        fontsize=10,
+    )
+    ax.set_title(
+        "Comorbilidades en Pacientes Fallecidos", fontsize=16, pad=20, color="white"
+    )
+    ax.axis("equal")
+    fig.text(
+        0.5,
+        0.02,
+        f"* Los porcentajes representan la proporción de cada comorbilidad sobre el total de {total_comorbilidades:,} comorbilidades registradas",
+        ha="center",
+        color="white",
+        fontsize=9,
+        alpha=0.7,
+    )
+    return fig
+
+
+# --- Distribución de intubación por rangos de edad ---
+def grafica_intubacion_edad(conteo_edad):
+    plt.style.use("dark_background")
+    fig1, ax1 = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
+    fig1.patch.set_facecolor("#1e1e2f")
+    color_intubado_si = "#e74c3c"  # Rojo para intubados
+    color_intubado_no = "#2ecc71"  # Verde para no intubados
+    sns.barplot(
+        data=conteo_edad,
+        x="RANGO_EDAD",
+        y="PACIENTES",
+        hue="ESTADO_INTUBADO",
+        palette={"Sí": color_intubado_si, "No": color_intubado_no},
+        alpha=0.8,
+        ax=ax1,
+    )
+    ax1.set_facecolor("#1e1e2f")
+    ax1.set_title(
+        "Pacientes Intubados por Rango de Edad", fontsize=16, pad=20, color="white"
+    )
+    ax1.set_xlabel("Rango de Edad", fontsize=12, color="white")
+    ax1.set_ylabel("Número de Pacientes", fontsize=12, color="white")
+    plt.xticks(rotation=45, ha="right", color="white")
+    plt.yticks(color="white")
+    ax1.grid(axis="y", linestyle="--", alpha=0.3, color="gray")
+    legend = ax1.legend(
+        title="Estado de Intubación", frameon=True, facecolor="#222244", edgecolor="gray"
+    )
+    legend.get_title().set_color("white")
+    for text in legend.get_texts():
+        text.set_color("white")
+    for bar in ax1.patches:
+        bar.set_edgecolor("white")
+        bar.set_linewidth(0.5)
+    for spine in ax1.spines.values():
+        spine.set_edgecolor("gray")
+        spine.set_linewidth(0.5)
+    for bar in ax1.patches:
+        height = bar.get_height()
+        if height > 0:
+            if height > max(conteo_edad["PACIENTES"]) * 0.05:
+                ax1.text(
+                    bar.get_x() + bar.get_width() / 2.0,
+                    bar.get_height() + 5,
+                    f"{int(height):,}",
+                    ha="center",
+                    va="bottom",
+                    color="white",
+                    fontsize=8,
+                    bbox=dict(boxstyle="round,pad=0.2", fc="#222244", alpha=0.7, ec="gray"),
+                )
+    plt.tight_layout()
+    return fig1
+
+
+# === Gráfico: Días entre inicio de síntomas e ingreso (0–20 días, en pasos de 2) ===
+# Recibe el histograma ya contado (np.histogram con los mismos bins)
+def grafica_sintomas_ingreso(histograma):
+    conteos, bins = histograma
+
+    plt.style.use("dark_background")
+    fig, ax = plt.subplots(figsize=(14, 7), facecolor="#1e1e2f")
+    fig.patch.set_facecolor("#1e1e2f")
+
+    color_base = "#3498db"  # Azul para el histograma
+    counts, edges, bars = ax.hist(
+        bins[:-1],
+        bins=bins,
+        weights=conteos,
+        edgecolor="white",
+        linewidth=0.8,
+        color=color_base,
+        alpha=0.8,
+    )
+    ax.set_facecolor("#1e1e2f")
+    ax.set_title(
+        "Distribución de Días con Síntomas antes del Ingreso Hospitalario",
+        fontsize=16,
+        pad=20,
+        color="white",
+    )
+    ax.set_xlabel(
+        "Días desde inicio de síntomas hasta ingreso",
+        fontsize=12,
+        color="white",
+        labelpad=10,
+    )
+    ax.set_ylabel("Número de Pacientes", fontsize=12, color="white", labelpad=10)
+
+    ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda x, pos: f"{int(x):,}"))
+
+    # Eje X con ticks pares y etiquetas mejoradas
+    ax.set_xticks(list(range(0, 21, 2)))  # 0, 2, 4, ..., 20
+    ax.tick_params(axis="both", colors="white", labelsize=10)
+    ax.grid(axis="y", linestyle="--", alpha=0.3, color="gray")
+
+    # Mostrar valores encima de las barras
+    for i, (count, bar) in enumerate(zip(counts, bars)):
+        height = bar.get_height()
+        if height > 0:
+            ax.annotate(
+                f"{int(count):,}",
+                xy=(bar.get_x() + bar.get_width() / 2, height),
+                xytext=(0, 5),
+                textcoords="offset points",
+                ha="center",
+                va="bottom",
+                fontsize=9,
+                color="white",
+                bbox=dict(boxstyle="round,pad=0.2", fc="#222244", alpha=0.7, ec="gray"),
+            )
+
+    for spine in ax.spines.values():
+        spine.set_edgecolor("gray")
+        spine.set_linewidth(0.5)
+
+    plt.tight_layout()
+    return fig